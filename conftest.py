@@ -0,0 +1,14 @@
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_caches():
+    """То же, что TemporaryCacheRunner для manage.py test: тесты очищают
+    кеш, и рабочий файл кеша не должен при этом пострадать."""
+    from core.runner import isolated_settings
+
+    with tempfile.TemporaryDirectory() as directory:
+        with isolated_settings(directory):
+            yield
@@ -0,0 +1,229 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import parse_http_date_safe
+
+from core import fragments
+
+PAGE_KEY = "pages:page:{digest}"
+TAG_KEY = "pages:tag:{tag}"
+STATS_KEY = "pages:stats:{event}"
+EVENTS = ("hits", "misses")
+STATS_INTERVAL = 10
+HEADER = "X-Page-Cache"
+# Заголовки, которые должен выставлять каждый новый ответ, а не копия.
+SKIPPED_HEADERS = {"set-cookie", "etag", "last-modified", HEADER.lower()}
+
+_events = Counter()
+_events_lock = threading.Lock()
+_events_flushed = time.monotonic()
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def tag(request, *keys):
+    """Помечает страницу суррогатными ключами; без ключей ответ не
+    кешируется, пустые ключи пропускаются. Ключом может быть и функция
+    без аргументов, возвращающая ключи: она вызывается, только если
+    страница попадёт в кеш."""
+    if not hasattr(request, "surrogate_keys"):
+        request.surrogate_keys = []
+    request.surrogate_keys.extend(keys)
+
+
+def _stamp(tags):
+    stamp = time.time_ns()
+    _cache().set_many(
+        {TAG_KEY.format(tag=tag): stamp for tag in tags}, None
+    )
+
+
+def purge(*tags):
+    """Делает устаревшими все страницы с любым из ключей tags.
+
+    Ключ запоминает время сброса, а страница -- время начала запроса,
+    который её построил. Сброс повторяется после коммита: страница,
+    собранная по ещё не закоммиченным данным, тоже станет устаревшей.
+    """
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+    _stamp(tags)
+    transaction.on_commit(lambda: _stamp(tags))
+
+
+def _record(event):
+    global _events_flushed
+    with _events_lock:
+        _events[event] += 1
+        if time.monotonic() - _events_flushed < STATS_INTERVAL:
+            return
+        events = dict(_events)
+        _events.clear()
+        _events_flushed = time.monotonic()
+    _flush(events)
+
+
+def _flush(events):
+    cache = _cache()
+    for event, count in events.items():
+        key = STATS_KEY.format(event=event)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            if not cache.add(key, count, None):
+                cache.incr(key, count)
+
+
+def stats():
+    """Попадания и промахи кеша страниц по всем процессам."""
+    with _events_lock:
+        events = dict(_events)
+        _events.clear()
+    _flush(events)
+    keys = {STATS_KEY.format(event=event): event for event in EVENTS}
+    values = _cache().get_many(keys)
+    return {event: values.get(key, 0) for key, event in keys.items()}
+
+
+def reset_stats():
+    with _events_lock:
+        _events.clear()
+    _cache().delete_many([STATS_KEY.format(event=event) for event in EVENTS])
+
+
+def _page_key(request):
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return PAGE_KEY.format(digest=digest)
+
+
+def _resolve(keys):
+    resolved = set()
+    for key in keys:
+        if callable(key):
+            resolved.update(key())
+        elif key:
+            resolved.add(key)
+    return resolved
+
+
+def _fresh(page):
+    """Ни один ключ страницы не сбрасывался после начала её построения.
+    Вытесненный из кеша ключ считается сброшенным."""
+    keys = [TAG_KEY.format(tag=tag) for tag in page["tags"]]
+    stamps = _cache().get_many(keys)
+    return len(stamps) == len(keys) and all(
+        stamp < page["started"] for stamp in stamps.values()
+    )
+
+
+def _restore(request, page):
+    """Ответ из оболочки страницы с фрагментами для пользователя request.
+
+    Страница, собранная представлением для гостя, вместе с её ETag и
+    Last-Modified подходит любому гостю и отдаётся как есть. Вошедшему
+    пользователю фрагменты рендерятся заново, ETag считается по
+    содержимому, а Last-Modified не отдаётся: фрагменты от времени
+    изменения постов не зависят.
+    """
+    guest = page["guest"]
+    if guest and settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        content, validators = guest
+    else:
+        content = fragments.assemble(request, page["content"])
+        validators = [("ETag", quote_etag(hashlib.md5(content).hexdigest()))]
+    response = HttpResponse(content, status=page["status"])
+    for header, value in page["headers"] + validators:
+        response[header] = value
+    response[HEADER] = "HIT"
+    response["Surrogate-Key"] = " ".join(page["tags"])
+    last_modified = response.get("Last-Modified")
+    return get_conditional_response(
+        request,
+        etag=response.get("ETag"),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=response,
+    )
+
+
+def _store(request, response, started):
+    tags = _resolve(request.surrogate_keys)
+    cache = _cache()
+    # Ключ, которого ещё нет, создаётся «никогда не сбрасывавшимся».
+    for tag in tags:
+        cache.add(TAG_KEY.format(tag=tag), 0, None)
+    page = {
+        "content": fragments.shell(response.content),
+        "status": response.status_code,
+        "headers": [
+            (header, value)
+            for header, value in response.items()
+            if header.lower() not in SKIPPED_HEADERS
+        ],
+        "tags": sorted(tags),
+        "started": started,
+        "guest": None,
+    }
+    if not request.user.is_authenticated:
+        page["guest"] = (
+            response.content,
+            [
+                (header, response[header])
+                for header in ("ETag", "Last-Modified")
+                if response.has_header(header)
+            ],
+        )
+    cache.set(_page_key(request), page, settings.PAGE_CACHE_TIMEOUT)
+    response["Surrogate-Key"] = " ".join(page["tags"])
+
+
+class PageCacheMiddleware:
+    """Кеш целых страниц.
+
+    В кеше лежит общая для всех оболочка страницы: фрагменты, зависящие
+    от пользователя, вырезаются (core.fragments) и при каждой выдаче
+    рендерятся заново, поэтому гость получает страницу вовсе без
+    обращений к базе, а вошедший пользователь -- ценой своих фрагментов.
+    Кешируются только ответы 200 на GET, которым представление задало
+    суррогатные ключи через tag(), и только без cookies. purge() по ключу
+    делает устаревшими ровно страницы с этим ключом. Попадания и промахи
+    копятся в процессе и раз в STATS_INTERVAL секунд сбрасываются в общий
+    кеш, откуда их читает stats().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            not settings.PAGE_CACHE_TIMEOUT
+            or request.method not in ("GET", "HEAD")
+        ):
+            return self.get_response(request)
+        page = _cache().get(_page_key(request))
+        if page is not None and _fresh(page):
+            _record("hits")
+            return _restore(request, page)
+        started = time.time_ns()
+        response = self.get_response(request)
+        if not getattr(request, "surrogate_keys", None):
+            return response
+        _record("misses")
+        response[HEADER] = "MISS"
+        if (
+            request.method == "GET"
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        ):
+            _store(request, response, started)
+        return response
@@ -0,0 +1,270 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    " key TEXT PRIMARY KEY,"
+    " value BLOB,"
+    " expires REAL,"
+    " accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)",
+    "CREATE TABLE IF NOT EXISTS cache_stats ("
+    " name TEXT PRIMARY KEY,"
+    " value INTEGER NOT NULL)",
+)
+ALIVE = "(expires IS NULL OR expires > ?)"
+INTEGER_RANGE = range(-(2 ** 63), 2 ** 63)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite в режиме WAL, общий для всех процессов хоста.
+
+    Значения живут до истечения TTL; при превышении MAX_ENTRIES удаляются
+    просроченные, а затем давно не читавшиеся (LRU) записи. Целые числа
+    хранятся как INTEGER, поэтому incr выполняется одним UPDATE.
+
+    Параметры OPTIONS помимо стандартных:
+    CULL_EVERY -- раз во сколько записей процесс проверяет размер кеша;
+    TOUCH_INTERVAL -- как часто (в секундах) чтение обновляет время
+    последнего доступа.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._cull_every = int(options.get("CULL_EVERY", 100))
+        self._touch_interval = float(options.get("TOUCH_INTERVAL", 1))
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        """Соединение своё у каждого потока и у каждого процесса."""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.db = self._connect()
+            local.pid = os.getpid()
+        return local.db
+
+    def _connect(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            db.execute(statement)
+        return db
+
+    @staticmethod
+    def _dump(value):
+        if type(value) is int and value in INTEGER_RANGE:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            f"SELECT value, accessed FROM cache WHERE key = ? AND {ALIVE}",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return default
+        value, accessed = row
+        if now - accessed > self._touch_interval:
+            self._db.execute(
+                "UPDATE cache SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return self._load(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ", ".join("?" * len(keys))
+        now = time.time()
+        rows = self._db.execute(
+            "SELECT key, value FROM cache "
+            f"WHERE key IN ({placeholders}) AND {ALIVE}",
+            (*keys, now),
+        ).fetchall()
+        return {keys[key]: self._load(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [
+            (self._key(key, version), self._dump(value), expires, now)
+            for key, value in data.items()
+        ]
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        self._maybe_cull(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now)
+            )
+            added = db.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires, accessed)"
+                " VALUES (?, ?, ?, ?)",
+                (key, self._dump(value), expires, now),
+            ).rowcount
+        if added:
+            self._maybe_cull(1)
+        return bool(added)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE cache SET value = value + ?, accessed = ? "
+                f"WHERE key = ? AND typeof(value) = 'integer' AND {ALIVE}",
+                (delta, now, key, now),
+            ).rowcount
+            if not updated:
+                raise ValueError(f"Key '{key}' not found")
+            (value,) = db.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        touched = self._db.execute(
+            "UPDATE cache SET expires = ?, accessed = ? "
+            f"WHERE key = ? AND {ALIVE}",
+            (self.get_backend_timeout(timeout), now, key, now),
+        ).rowcount
+        return bool(touched)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            f"SELECT 1 FROM cache WHERE key = ? AND {ALIVE}",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._transaction() as db:
+            db.executemany("DELETE FROM cache WHERE key = ?", keys)
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache")
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def _maybe_cull(self, written):
+        self._writes += written
+        if self._writes < self._cull_every:
+            return
+        self._writes = 0
+        self._cull()
+
+    def _cull(self):
+        """Удаляет просроченные записи, а при переполнении -- часть
+        самых давно читавшихся."""
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM cache WHERE expires <= ?", (time.time(),)
+            )
+            (count,) = db.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if count <= self._max_entries:
+                return
+            excess = count - self._max_entries
+            if self._cull_frequency:
+                excess = max(excess, count // self._cull_frequency)
+            evicted = db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                (excess,),
+            ).rowcount
+            db.execute(
+                "INSERT INTO cache_stats (name, value) VALUES ('evictions', ?)"
+                " ON CONFLICT (name) DO UPDATE SET value = value + ?",
+                (evicted, evicted),
+            )
+
+    def evictions(self):
+        """Сколько записей вытеснено по LRU всеми процессами."""
+        row = self._db.execute(
+            "SELECT value FROM cache_stats WHERE name = 'evictions'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def close(self, **kwargs):
+        # Соединение переиспользуется между запросами потока.
+        pass
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT: запись не ждёт повышения блокировки
+    и не ловит SQLITE_BUSY посреди транзакции."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def temporary_caches(directory):
+    """Копия CACHES, в которой файлы кешей SQLiteCache лежат в directory.
+
+    Тесты и замеры очищают кеши целиком: с такими настройками рабочий
+    файл кеша остаётся нетронутым.
+    """
+    backend = f"{__name__}.{SQLiteCache.__name__}"
+    caches = {}
+    for alias, config in settings.CACHES.items():
+        caches[alias] = dict(config)
+        if config["BACKEND"] == backend:
+            caches[alias]["LOCATION"] = os.path.join(
+                directory, f"{alias}.sqlite3"
+            )
+    return caches
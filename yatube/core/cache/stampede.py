@@ -0,0 +1,94 @@
+import math
+import random
+import time
+
+from django.core.cache import cache as default_cache
+
+LOCK_KEY = "{key}:lock"
+LOCK_TIMEOUT = 30
+WAIT_INTERVAL = 0.05
+
+
+def _expires_early(expires, delta, beta):
+    """Вероятностное досрочное истечение (XFetch).
+
+    Чем дольше вычисляется значение и чем ближе срок, тем вероятнее, что
+    очередной запрос пересчитает его заранее, пока остальные ещё читают
+    старое.
+    """
+    jitter = -delta * beta * math.log(1 - random.random())
+    return time.time() + jitter >= expires
+
+
+def _locks(cache):
+    # Блокировки живут в общем кеше: удаление ключа в TieredCache
+    # сбрасывает локальные уровни всех процессов.
+    return getattr(cache, "shared", cache)
+
+
+def _recompute(cache, key, compute, timeout, stale):
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        if timeout is None:
+            cache.set(key, (value, math.inf, delta), None)
+        else:
+            expires = time.time() + timeout
+            cache.set(key, (value, expires, delta), timeout + stale)
+        return value
+    finally:
+        _locks(cache).delete(LOCK_KEY.format(key=key))
+
+
+def get_or_compute(
+    key,
+    compute,
+    timeout,
+    cache=None,
+    stale=None,
+    beta=1.0,
+    lock_timeout=LOCK_TIMEOUT,
+):
+    """Значение из кеша или результат compute(), защищённый от лавины.
+
+    Пересчитывает значение только тот, кто взял блокировку на ключ.
+    После истечения timeout значение ещё stale секунд (по умолчанию
+    столько же, сколько timeout) отдаётся остальным запросам, пока идёт
+    пересчёт. Если значения нет совсем, остальные ждут его не дольше
+    lock_timeout, а затем считают сами. beta управляет досрочным
+    пересчётом: 0 отключает его, больше 1 делает его чаще.
+    """
+    cache = cache or default_cache
+    if stale is None:
+        stale = timeout
+    entry = cache.get(key)
+    if entry is None:
+        return _wait_or_compute(
+            cache, key, compute, timeout, stale, lock_timeout
+        )
+    value, expires, delta = entry
+    if not _expires_early(expires, delta, beta):
+        return value
+    if not _locks(cache).add(LOCK_KEY.format(key=key), 1, lock_timeout):
+        return value
+    return _recompute(cache, key, compute, timeout, stale)
+
+
+def _wait_or_compute(cache, key, compute, timeout, stale, lock_timeout):
+    """Промах: считает владелец блокировки, остальные ждут результата."""
+    locks = _locks(cache)
+    lock_key = LOCK_KEY.format(key=key)
+    deadline = time.monotonic() + lock_timeout
+    while not locks.add(lock_key, 1, lock_timeout):
+        if time.monotonic() >= deadline:
+            return compute()
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    entry = cache.get(key)
+    if entry is not None and entry[1] > time.time():
+        locks.delete(lock_key)
+        return entry[0]
+    return _recompute(cache, key, compute, timeout, stale)
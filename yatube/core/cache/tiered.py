@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+STAMP_KEY = "tiered:stamp"
+STATS_KEY = "tiered:stats:{layer}:{event}"
+STATS = [
+    ("l1", "hits"),
+    ("l1", "misses"),
+    ("l1", "evictions"),
+    ("l2", "hits"),
+    ("l2", "misses"),
+]
+_MISSING = object()
+# Как и у LocMemCache, состояние L1 общее для всех потоков процесса:
+# django.core.cache.caches создаёт отдельный экземпляр бэкенда на поток.
+_layers = {}
+_layers_lock = threading.Lock()
+
+
+class _Layer:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.stamp_checked = 0
+        self.events = Counter()
+        self.events_flushed = time.monotonic()
+
+
+class TieredCache(BaseCache):
+    """Небольшой LRU-кеш процесса (L1) перед общим кешем (L2).
+
+    LOCATION -- алиас общего кеша из CACHES. Значения из L1 отдаются без
+    обращения к L2, пока не истёк короткий L1_TIMEOUT. Удаление, incr и
+    invalidate() увеличивают общий штамп версии; остальные процессы
+    сверяют его не чаще раза в STAMP_INTERVAL секунд и при изменении
+    очищают свой L1 целиком. Поэтому удаление дорогое и годится для
+    редких событий вроде переименования; частые удаления (блокировки
+    get_or_compute) идут мимо L1 прямо в L2. Размер L1 задаёт
+    стандартный MAX_ENTRIES.
+
+    Счётчики попаданий, промахов и вытеснений по уровням копятся в
+    процессе и раз в STATS_INTERVAL секунд сбрасываются в L2, откуда их
+    читает stats(). Вытеснения L2 берутся у самого L2, если он их считает.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._alias = location
+        self._l1_timeout = float(options.get("L1_TIMEOUT", 5))
+        self._stamp_interval = float(options.get("STAMP_INTERVAL", 1))
+        self._stats_interval = float(options.get("STATS_INTERVAL", 10))
+        with _layers_lock:
+            self._layer = _layers.setdefault(location, _Layer())
+
+    @property
+    def shared(self):
+        return caches[self._alias]
+
+    def _check_stamp(self):
+        layer = self._layer
+        now = time.monotonic()
+        if now - layer.stamp_checked < self._stamp_interval:
+            return
+        layer.stamp_checked = now
+        stamp = self.shared.get(STAMP_KEY)
+        if stamp != layer.stamp:
+            with layer.lock:
+                layer.entries.clear()
+            layer.stamp = stamp
+
+    def invalidate(self):
+        """Заставляет все процессы сбросить свой L1.
+
+        Если штамп вытеснен из L2, новый берётся от текущего времени, как
+        posts_version: начни он снова с 1, записи L1 под старым штампом 1
+        снова сочлись бы свежими.
+        """
+        try:
+            stamp = self.shared.incr(STAMP_KEY)
+        except ValueError:
+            self.shared.add(STAMP_KEY, time.time_ns(), None)
+            stamp = self.shared.get(STAMP_KEY)
+        with self._layer.lock:
+            self._layer.entries.clear()
+        self._layer.stamp = stamp
+
+    def _local_get(self, key):
+        layer = self._layer
+        with layer.lock:
+            entry = layer.entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires <= time.monotonic():
+                del layer.entries[key]
+                return _MISSING
+            layer.entries.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value, timeout):
+        ttl = self._l1_timeout
+        expires_at = self.get_backend_timeout(timeout)
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        layer = self._layer
+        with layer.lock:
+            layer.entries[key] = (value, time.monotonic() + ttl)
+            layer.entries.move_to_end(key)
+            while len(layer.entries) > self._max_entries:
+                layer.entries.popitem(last=False)
+                layer.events["l1", "evictions"] += 1
+
+    def _local_delete(self, keys):
+        with self._layer.lock:
+            for key in keys:
+                self._layer.entries.pop(key, None)
+
+    def _record(self, layer, event, count=1):
+        self._layer.events[layer, event] += count
+        since_flush = time.monotonic() - self._layer.events_flushed
+        if since_flush >= self._stats_interval:
+            self.flush_stats()
+
+    def get(self, key, default=None, version=None):
+        self._check_stamp()
+        local_key = self.make_key(key, version)
+        value = self._local_get(local_key)
+        if value is not _MISSING:
+            self._record("l1", "hits")
+            return value
+        self._record("l1", "misses")
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record("l2", "misses")
+            return default
+        self._record("l2", "hits")
+        self._local_set(local_key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._check_stamp()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._local_get(self.make_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._record("l1", "hits", len(found))
+        self._record("l1", "misses", len(missing))
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            self._record("l2", "hits", len(shared))
+            self._record("l2", "misses", len(missing) - len(shared))
+            for key, value in shared.items():
+                self._local_set(
+                    self.make_key(key, version), value, DEFAULT_TIMEOUT
+                )
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(self.make_key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self.make_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(self.make_key(key, version), value, timeout)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.invalidate()
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def has_key(self, key, version=None):
+        self._check_stamp()
+        local_key = self.make_key(key, version)
+        if self._local_get(local_key) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        self.shared.delete_many(keys, version=version)
+        self._local_delete(self.make_key(key, version) for key in keys)
+        self.invalidate()
+
+    def clear(self):
+        self.shared.clear()
+        with self._layer.lock:
+            self._layer.events.clear()
+        self.invalidate()
+
+    def flush_stats(self):
+        """Переносит накопленные в процессе счётчики в общий кеш."""
+        layer = self._layer
+        with layer.lock:
+            events, layer.events = layer.events, Counter()
+            layer.events_flushed = time.monotonic()
+        for (layer, event), count in events.items():
+            key = STATS_KEY.format(layer=layer, event=event)
+            try:
+                self.shared.incr(key, count)
+            except ValueError:
+                if not self.shared.add(key, count, None):
+                    self.shared.incr(key, count)
+
+    def stats(self):
+        """Суммарные по всем процессам попадания, промахи и вытеснения."""
+        self.flush_stats()
+        keys = {
+            STATS_KEY.format(layer=layer, event=event): (layer, event)
+            for layer, event in STATS
+        }
+        values = self.shared.get_many(keys)
+        report = {"l1": {}, "l2": {}}
+        for key, (layer, event) in keys.items():
+            report[layer][event] = values.get(key, 0)
+        evictions = getattr(self.shared, "evictions", None)
+        if evictions is not None:
+            report["l2"]["evictions"] = evictions()
+        return report
@@ -0,0 +1,63 @@
+import re
+from urllib.parse import quote, unquote
+
+from django.template.loader import render_to_string
+
+START = "<!--fragment:{name}:{args}-->"
+END = "<!--/fragment-->"
+FRAGMENT_RE = re.compile(
+    rb"<!--fragment:([\w-]+):([^>]*?)-->(.*?)<!--/fragment-->", re.S
+)
+FRAGMENTS = {}
+
+
+def register(name):
+    """Регистрирует фрагмент страницы, зависящий от пользователя.
+
+    Функция получает запрос и строковые аргументы фрагмента и возвращает
+    его HTML. Она должна брать всё, кроме аргументов, из запроса: при
+    сборке страницы из кеша контекста представления нет.
+    """
+
+    def decorator(function):
+        FRAGMENTS[name] = function
+        return function
+
+    return decorator
+
+
+def render(request, name, args):
+    """HTML фрагмента в метках, по которым его можно вырезать из
+    страницы и вставить заново для другого пользователя."""
+    args = [str(arg) for arg in args]
+    html = FRAGMENTS[name](request, *args)
+    encoded = ":".join(quote(arg, safe="") for arg in args)
+    return f"{START.format(name=name, args=encoded)}{html}{END}"
+
+
+def shell(content):
+    """Общая для всех пользователей часть страницы: фрагменты пустые."""
+    return FRAGMENT_RE.sub(rb"<!--fragment:\1:\2--><!--/fragment-->", content)
+
+
+def assemble(request, content):
+    """Страница для пользователя request: фрагменты оболочки content
+    рендерятся заново. Одинаковые фрагменты рендерятся один раз."""
+    rendered = {}
+
+    def fill(match):
+        key = match.group(1, 2)
+        if key not in rendered:
+            name, encoded = (part.decode() for part in key)
+            args = [unquote(arg) for arg in encoded.split(":") if encoded]
+            rendered[key] = render(request, name, args).encode()
+        return rendered[key]
+
+    return FRAGMENT_RE.sub(fill, content)
+
+
+@register("user_menu")
+def user_menu(request, view_name):
+    return render_to_string(
+        "includes/user_menu.html", {"view_name": view_name}, request
+    )
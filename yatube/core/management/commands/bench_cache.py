@@ -0,0 +1,95 @@
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "sqlite": "core.cache.sqlite.SQLiteCache",
+}
+VALUE = "x" * 2048
+
+
+def _worker(backend, location, keys, operations, seed, results):
+    cache = import_string(BACKENDS[backend])(
+        location, {"TIMEOUT": 300, "OPTIONS": {"MAX_ENTRIES": keys * 2}}
+    )
+    generator = random.Random(seed)
+    hits = 0
+    started = time.perf_counter()
+    for _ in range(operations):
+        # Часть ключей горячая, но хвост достаточно длинный, чтобы
+        # отдельным кешам каждого процесса приходилось прогреваться.
+        key = f"key:{int(keys * generator.random() ** 2)}"
+        if cache.get(key) is None:
+            cache.set(key, VALUE)
+        else:
+            hits += 1
+    results.put((time.perf_counter() - started, hits))
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает LocMemCache, FileBasedCache и SQLiteCache "
+        "при разном числе процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, nargs="+", default=[1, 4, 16]
+        )
+        parser.add_argument(
+            "--backends",
+            nargs="+",
+            choices=list(BACKENDS),
+            default=list(BACKENDS),
+        )
+        parser.add_argument("--operations", type=int, default=5000)
+        parser.add_argument("--keys", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'кеш':<8} {'процессов':>9} {'оп/с':>10} {'попаданий':>10}"
+        )
+        for backend in options["backends"]:
+            for processes in options["processes"]:
+                rate, hit_ratio = self.run_case(
+                    backend,
+                    processes,
+                    options["operations"],
+                    options["keys"],
+                )
+                self.stdout.write(
+                    f"{backend:<8} {processes:>9} {rate:>10.0f} "
+                    f"{hit_ratio:>10.1%}"
+                )
+
+    def run_case(self, backend, processes, operations, keys):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        with tempfile.TemporaryDirectory() as directory:
+            location = (
+                f"{directory}/cache.sqlite3"
+                if backend == "sqlite"
+                else directory
+            )
+            workers = [
+                context.Process(
+                    target=_worker,
+                    args=(backend, location, keys, operations, seed, results),
+                )
+                for seed in range(processes)
+            ]
+            for worker in workers:
+                worker.start()
+            timings = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+        elapsed = max(duration for duration, _ in timings)
+        hits = sum(hit for _, hit in timings)
+        total = operations * processes
+        return total / elapsed, hits / total
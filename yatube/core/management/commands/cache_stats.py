@@ -0,0 +1,36 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.cache import pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает попадания, промахи и вытеснения по уровням кеша "
+        "и долю страниц, отданных из кеша страниц."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alias",
+            default="hot",
+            help="Алиас двухуровневого кеша из CACHES.",
+        )
+
+    def handle(self, *args, alias, **options):
+        stats = caches[alias].stats()
+        for layer, events in stats.items():
+            lookups = events["hits"] + events["misses"]
+            ratio = events["hits"] / lookups if lookups else 0
+            self.stdout.write(
+                f"{layer}: hits={events['hits']} misses={events['misses']} "
+                f"evictions={events.get('evictions', 0)} "
+                f"hit_ratio={ratio:.1%}"
+            )
+        events = pages.stats()
+        lookups = events["hits"] + events["misses"]
+        ratio = events["hits"] / lookups if lookups else 0
+        self.stdout.write(
+            f"pages: hits={events['hits']} misses={events['misses']} "
+            f"hit_ratio={ratio:.1%}"
+        )
@@ -0,0 +1,61 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core import thumbnails
+
+
+def _walk(directory):
+    directories, files = default_storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for name in directories:
+        yield from _walk(os.path.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт миниатюры THUMBNAIL_PRESETS для уже загруженных картинок "
+        "на пуле процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            default="posts",
+            help="Каталог в хранилище медиафайлов.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Число процессов; 0 -- создавать в текущем процессе.",
+        )
+
+    def handle(self, *args, directory, workers, **options):
+        if not default_storage.exists(directory):
+            self.stdout.write(f"Каталога {directory} нет в хранилище.")
+            return
+        names = list(_walk(directory))
+        self.stdout.write(
+            f"Картинок: {len(names)}, "
+            f"миниатюр на картинку: {len(settings.THUMBNAIL_PRESETS)}."
+        )
+        if workers:
+            with thumbnails.make_pool(workers) as pool:
+                results = pool.map(thumbnails.generate, names, chunksize=8)
+                done = self.report(results)
+        else:
+            done = self.report(map(thumbnails.generate, names))
+        self.stdout.write(
+            self.style.SUCCESS(f"Готово: обработано картинок: {done}.")
+        )
+
+    def report(self, results):
+        done = 0
+        for done, _ in enumerate(results, 1):
+            if done % 100 == 0:
+                self.stdout.write(f"Обработано: {done}")
+        return done
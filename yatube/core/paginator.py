@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+MAX_KEY = 2 ** 63 - 1
+MIN_KEY = -(2 ** 63)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def pack_cursor(*values):
+    """Упаковывает позицию в непрозрачный токен."""
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def unpack_cursor(token):
+    """Распаковывает токен обратно в список значений."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(token)
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values
+
+
+def encode_cursor(pub_date, pk):
+    """Упаковывает позицию (pub_date, id) в непрозрачный токен."""
+    return pack_cursor(pub_date.isoformat(), pk)
+
+
+def cursor_key(value):
+    """id из курсора. SQLite хранит INTEGER в 64 битах со знаком, и
+    большее число в запросе роняет его с OverflowError."""
+    pk = int(value)
+    if not MIN_KEY <= pk <= MAX_KEY:
+        raise ValueError(f"id вне диапазона: {pk}")
+    return pk
+
+
+def decode_cursor(token):
+    """Распаковывает токен обратно в пару (pub_date, id)."""
+    try:
+        pub_date, pk = unpack_cursor(token)
+        pub_date = parse_datetime(pub_date)
+        pk = cursor_key(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor(token)
+    if pub_date is None:
+        raise InvalidCursor(token)
+    return pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (pub_date, id) вместо OFFSET.
+
+    Страница выбирается условием по ключу сортировки и LIMIT per_page + 1,
+    поэтому далёкие страницы стоят столько же, сколько первая, а COUNT(*)
+    не выполняется: общее число строк, если оно нужно, берётся из
+    функции count. Один экземпляр обслуживает одну страницу: номер
+    страницы и num_pages считаются относительно неё, чтобы стандартные
+    Page.has_next() и Page.has_previous() работали без подсчёта строк.
+    """
+
+    date_field = "pub_date"
+    key_field = "id"
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(
+            object_list.order_by(
+                f"-{self.date_field}", f"-{self.key_field}"
+            ),
+            per_page,
+            **kwargs,
+        )
+        self.has_next = False
+        self.has_previous = False
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return super().count
+        return self._count()
+
+    @property
+    def num_pages(self):
+        return self._number + self.has_next
+
+    @property
+    def _number(self):
+        return 1 + self.has_previous
+
+    def _after(self, queryset, position, forward, key_field=None):
+        """Оставляет строки, идущие за позицией в направлении обхода."""
+        date, pk = position
+        lookup = "lt" if forward else "gt"
+        key_field = key_field or self.key_field
+        return queryset.filter(
+            Q(**{f"{self.date_field}__{lookup}": date})
+            | Q(**{self.date_field: date, f"{key_field}__{lookup}": pk})
+        )
+
+    def _fetch(self, position, forward):
+        """Возвращает до per_page + 1 строк за позицией.
+
+        При обходе назад строки идут от старых к новым.
+        """
+        queryset = self.object_list
+        if position is not None:
+            queryset = self._after(queryset, position, forward)
+        if not forward:
+            queryset = queryset.reverse()
+        return list(queryset[: self.per_page + 1])
+
+    def _cursor(self, obj):
+        return encode_cursor(
+            getattr(obj, self.date_field), getattr(obj, self.key_field)
+        )
+
+    def _position(self, token):
+        return decode_cursor(token)
+
+    def get_cursor_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before.
+
+        Без курсоров, с повреждённым курсором или когда перед before
+        не набирается полной страницы, возвращает первую страницу.
+        """
+        token = after or before
+        backward = bool(before) and not after
+        try:
+            position = self._position(token) if token else None
+        except InvalidCursor:
+            position = None
+            backward = False
+        rows = self._fetch(position, forward=not backward)
+        if backward and len(rows) <= self.per_page:
+            position = None
+            backward = False
+            rows = self._fetch(position, forward=True)
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backward:
+            rows.reverse()
+            self.has_previous = self.has_next = True
+        else:
+            self.has_previous = position is not None and bool(rows)
+            self.has_next = has_more
+        if self.has_next:
+            self.next_cursor = self._cursor(rows[-1])
+        if self.has_previous:
+            self.previous_cursor = self._cursor(rows[0])
+        return self._get_page(rows, self._number, self)
@@ -0,0 +1,30 @@
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from core.cache.sqlite import temporary_caches
+
+
+def isolated_settings(directory):
+    """Настройки тестов: файлы кешей SQLite лежат в directory, а картинки
+    обрабатываются в том же процессе. Процессы пула загружают модуль
+    настроек заново и работали бы с рабочими кешем и базой."""
+    return override_settings(
+        CACHES=temporary_caches(directory), THUMBNAIL_WORKERS=0
+    )
+
+
+class TemporaryCacheRunner(DiscoverRunner):
+    """Запускает тесты с кешами SQLite во временном каталоге."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.cache_settings = isolated_settings(self.cache_directory.name)
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
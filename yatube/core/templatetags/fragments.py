@@ -0,0 +1,16 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import fragments
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, name, *args):
+    """Фрагмент страницы, зависящий от пользователя.
+
+    Выводится сразу, но в метках: кеш страниц хранит страницу без него
+    и вставляет фрагмент для каждого пользователя заново.
+    """
+    return mark_safe(fragments.render(context["request"], name, args))
@@ -0,0 +1,65 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Library, TemplateSyntaxError, VariableDoesNotExist
+from django.templatetags.cache import CacheNode, do_cache
+
+from core.cache.stampede import get_or_compute
+
+register = Library()
+
+
+class StampedeCacheNode(CacheNode):
+    """Фрагмент {% cache %}, пересчитываемый через get_or_compute."""
+
+    def _resolve(self, var, context):
+        try:
+            return var.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: {var.var!r}'
+            )
+
+    def _get_cache(self, context):
+        if not self.cache_name:
+            try:
+                return caches["template_fragments"]
+            except InvalidCacheBackendError:
+                return caches["default"]
+        cache_name = self._resolve(self.cache_name, context)
+        try:
+            return caches[cache_name]
+        except InvalidCacheBackendError:
+            raise TemplateSyntaxError(
+                f"Invalid cache name specified for cache tag: {cache_name!r}"
+            )
+
+    def render(self, context):
+        expire_time = self._resolve(self.expire_time_var, context)
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise TemplateSyntaxError(
+                    '"cache" tag got a non-integer timeout value: '
+                    f"{expire_time!r}"
+                )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+            cache=self._get_cache(context),
+        )
+
+
+@register.tag("cache")
+def do_stampede_cache(parser, token):
+    """Тот же синтаксис, что у {% cache %} из библиотеки cache."""
+    node = do_cache(parser, token)
+    return StampedeCacheNode(
+        node.nodelist,
+        node.expire_time_var,
+        node.fragment_name,
+        node.vary_on,
+        node.cache_name,
+    )
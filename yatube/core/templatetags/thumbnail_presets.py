@@ -0,0 +1,109 @@
+import json
+from types import SimpleNamespace
+
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from core import variants
+from core.thumbnails import ready_thumbnail, ready_thumbnails
+
+register = template.Library()
+
+PREFETCHED = "prefetched_thumbnails"
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_thumbnails(context, posts, preset):
+    """Загружает миниатюры картинок всех постов страницы разом.
+
+    Следующие за ним thumbnail_preset с тем же пресетом берут миниатюры
+    из загруженного, не обращаясь к хранилищу по одной.
+    """
+    prefetched = context.get(PREFETCHED, {})
+    images = [post.image for post in posts if post.image]
+    found = ready_thumbnails(images, preset)
+    for image in images:
+        prefetched[preset, image.name] = found.get(image.name)
+    context[PREFETCHED] = prefetched
+    return ""
+
+
+@register.simple_tag(takes_context=True)
+def thumbnail_preset(context, image, preset):
+    """Заранее созданная миниатюра; пока её нет -- исходная картинка.
+
+    Исходник при этом не открывается: миниатюры создаёт фоновый пул.
+    """
+    if not image:
+        return None
+    prefetched = context.get(PREFETCHED, {})
+    key = preset, image.name
+    if key in prefetched:
+        thumbnail = prefetched[key]
+    else:
+        thumbnail = ready_thumbnail(image, preset)
+    return thumbnail or _original(image)
+
+
+def _original(image):
+    """Исходная картинка с размерами из полей модели <поле>_width и
+    <поле>_height, если они есть: ImageFieldFile.width открыл бы файл."""
+    name = image.field.name
+    return SimpleNamespace(
+        url=image.url,
+        width=getattr(image.instance, f"{name}_width", None),
+        height=getattr(image.instance, f"{name}_height", None),
+    )
+
+
+def _variant_image(image, variant_set, by_format):
+    # Для браузеров без srcset и без WebP -- JPEG, если он есть.
+    image_format = "jpeg" if "jpeg" in by_format else next(iter(by_format))
+    sizes = by_format[image_format]
+    width, height = sizes[-1]
+    name = variants.variant_name(image.name, variant_set, width, image_format)
+    return SimpleNamespace(
+        url=default_storage.url(name),
+        width=width,
+        height=height,
+        srcset=variants.srcset(image.name, variant_set, image_format, sizes),
+    )
+
+
+@register.inclusion_tag("includes/responsive_image.html", takes_context=True)
+def responsive_image(context, image, variant_set, sizes="100vw", css_class=""):
+    """<picture> с вариантами картинки разной ширины в WebP и JPEG.
+
+    Сведения о вариантах берутся из поля модели <поле>_variants, хранилище
+    не открывается. Пока вариантов нет -- миниатюра пресета с тем же
+    именем, если он есть, или исходная картинка.
+    """
+    if not image:
+        return {"image": None}
+    field = image.field.name
+    described = getattr(image.instance, f"{field}_variants", "")
+    by_format = json.loads(described).get(variant_set) if described else None
+    result = {
+        "sizes": sizes,
+        "css_class": css_class,
+        "placeholder": getattr(image.instance, f"{field}_placeholder", ""),
+        "sources": [],
+    }
+    if by_format:
+        result["image"] = _variant_image(image, variant_set, by_format)
+        result["sources"] = [
+            {
+                "type": variants.MIME[image_format],
+                "srcset": variants.srcset(
+                    image.name, variant_set, image_format, pairs
+                ),
+            }
+            for image_format, pairs in by_format.items()
+            if image_format != "jpeg"
+        ]
+    elif variant_set in settings.THUMBNAIL_PRESETS:
+        result["image"] = thumbnail_preset(context, image, variant_set)
+    else:
+        result["image"] = _original(image)
+    return result
@@ -0,0 +1,201 @@
+import multiprocessing
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.cache.sqlite import SQLiteCache, temporary_caches
+from core.cache.stampede import get_or_compute
+from core.cache.tiered import STAMP_KEY, TieredCache
+
+
+def _increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr("hits")
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.location = f"{self.directory.name}/cache.sqlite3"
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {"OPTIONS": options})
+
+    def test_values_survive_between_instances(self):
+        """Значения видны другим экземплярам, работающим с тем же файлом."""
+        self.cache.set("post", {"text": "TEXT"})
+        self.cache.set("count", 5)
+        other = self.make_cache()
+        self.assertEqual(other.get("post"), {"text": "TEXT"})
+        self.assertEqual(
+            other.get_many(["post", "count", "missing"]),
+            {"post": {"text": "TEXT"}, "count": 5},
+        )
+        other.delete("post")
+        self.assertIsNone(self.cache.get("post"))
+
+    def test_timeout(self):
+        """Просроченные значения не отдаются, а add их перезаписывает."""
+        self.cache.set("key", "old", timeout=0.05)
+        self.assertFalse(self.cache.add("key", "new"))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "new"))
+        self.assertEqual(self.cache.get("key"), "new")
+
+    def test_incr_is_atomic_across_processes(self):
+        """incr не теряет приращения при одновременной записи."""
+        self.cache.set("hits", 0)
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_increment, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get("hits"), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        cache = self.make_cache(
+            MAX_ENTRIES=3, CULL_EVERY=1, TOUCH_INTERVAL=0
+        )
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get("a")
+        cache.set("d", "d")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertEqual(cache.get("d"), "d")
+
+    def test_temporary_caches(self):
+        """Временные настройки переносят только файлы SQLiteCache."""
+        configured = temporary_caches(self.directory.name)
+        self.assertEqual(
+            configured["default"]["LOCATION"],
+            f"{self.directory.name}/default.sqlite3",
+        )
+        self.assertEqual(configured["hot"], settings.CACHES["hot"])
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tiered-tests",
+        }
+    }
+)
+class TieredCacheTests(SimpleTestCase):
+    def make_cache(self, **options):
+        options.setdefault("STAMP_INTERVAL", 0)
+        cache = TieredCache("default", {"OPTIONS": options})
+        cache.clear()
+        return cache
+
+    def test_hits_are_served_from_process(self):
+        """Повторное чтение не обращается к общему кешу."""
+        cache = self.make_cache()
+        cache.set("group", "GROUP")
+        caches["default"].delete("group")
+        self.assertEqual(cache.get("group"), "GROUP")
+        self.assertIsNone(cache.get("missing"))
+        stats = cache.stats()
+        self.assertEqual(stats["l1"]["hits"], 1)
+        self.assertEqual(stats["l1"]["misses"], 1)
+        self.assertEqual(stats["l2"]["misses"], 1)
+
+    def test_stamp_drops_stale_entries(self):
+        """Смена штампа другим процессом сбрасывает локальный уровень."""
+        cache = self.make_cache()
+        cache.set("group", "OLD")
+        shared = caches["default"]
+        shared.set("group", "NEW")
+        self.assertEqual(cache.get("group"), "OLD")
+        shared.incr(STAMP_KEY)
+        self.assertEqual(cache.get("group"), "NEW")
+
+    def test_evicted_stamp_does_not_go_back(self):
+        """Штамп, вытесненный из общего кеша, не начинается заново."""
+        cache = self.make_cache()
+        shared = caches["default"]
+        first = shared.get(STAMP_KEY)
+        shared.delete(STAMP_KEY)
+        cache.invalidate()
+        self.assertGreater(shared.get(STAMP_KEY), first)
+
+    def test_lru_eviction(self):
+        """Переполненный локальный уровень вытесняет старые записи."""
+        cache = self.make_cache(MAX_ENTRIES=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        self.assertEqual(cache.get("a"), "a")
+        stats = cache.stats()
+        self.assertEqual(stats["l1"]["evictions"], 2)
+        self.assertEqual(stats["l1"]["misses"], 1)
+        self.assertEqual(stats["l2"]["hits"], 1)
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SQLiteCache(f"{self.directory.name}/cache.sqlite3", {})
+        self.computations = 0
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compute(self, value="FRAGMENT"):
+        with self.lock:
+            self.computations += 1
+        time.sleep(0.2)
+        return value
+
+    def test_parallel_misses_compute_once(self):
+        """200 одновременных промахов по одному ключу считают его один раз."""
+        barrier = threading.Barrier(200)
+
+        def read(_):
+            barrier.wait()
+            return get_or_compute("fragment", self.compute, 60, self.cache)
+
+        with ThreadPoolExecutor(max_workers=200) as pool:
+            results = list(pool.map(read, range(200)))
+        self.assertEqual(self.computations, 1)
+        self.assertEqual(set(results), {"FRAGMENT"})
+
+    def test_stale_value_served_while_recomputing(self):
+        """Пока один запрос пересчитывает значение, другие получают старое."""
+        get_or_compute(
+            "fragment", lambda: "OLD", 0.05, self.cache, stale=60, beta=0
+        )
+        time.sleep(0.1)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            recompute = pool.submit(
+                get_or_compute,
+                "fragment",
+                lambda: self.compute("NEW"),
+                60,
+                self.cache,
+            )
+            time.sleep(0.05)
+            stale = get_or_compute("fragment", self.compute, 60, self.cache)
+        self.assertEqual(stale, "OLD")
+        self.assertEqual(recompute.result(), "NEW")
+        self.assertEqual(self.computations, 1)
@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import thumbnails
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(200, 10, 10)).save(buffer, "JPEG")
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailPresetTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.name = default_storage.save("posts/photo.jpg", make_image())
+        self.post = Post(image=self.name, image_width=1200, image_height=800)
+
+    def tearDown(self):
+        shutil.rmtree(default_storage.path("posts"), ignore_errors=True)
+
+    def render(self):
+        return Template(
+            "{% load thumbnail_presets %}"
+            '{% thumbnail_preset name "post_card" as im %}'
+            "{{ im.url }} {{ im.width }}x{{ im.height }}"
+        ).render(Context({"name": self.post.image}))
+
+    def test_template_reads_only_ready_thumbnails(self):
+        """Пока миниатюры нет, шаблон отдаёт исходник и не создаёт её."""
+        self.assertIsNone(thumbnails.ready_thumbnail(self.name, "post_card"))
+        self.assertEqual(self.render(), f"/media/{self.name} 1200x800")
+        self.assertIsNone(thumbnails.ready_thumbnail(self.name, "post_card"))
+        thumbnails.schedule(self.name)
+        thumbnail = thumbnails.ready_thumbnail(self.name, "post_card")
+        self.assertTrue(default_storage.exists(thumbnail.name))
+        self.assertEqual(self.render(), f"{thumbnail.url} 960x339")
+
+    def test_backfill_command(self):
+        """Команда создаёт миниатюры для уже загруженных картинок."""
+        call_command("pregenerate_thumbnails", workers=0, stdout=StringIO())
+        self.assertIsNotNone(
+            thumbnails.ready_thumbnail(self.name, "post_card")
+        )
+
+    def test_page_thumbnails_prefetched_at_once(self):
+        """Миниатюры всей страницы читаются одним запросом к базе."""
+        names = [
+            default_storage.save(f"posts/page_{number}.jpg", make_image())
+            for number in range(3)
+        ]
+        for name in names[:2]:
+            thumbnails.schedule(name)
+        ready = [
+            thumbnails.ready_thumbnail(name, "post_card") for name in names
+        ]
+        cache.clear()
+        template = Template(
+            "{% load thumbnail_presets %}"
+            '{% prefetch_thumbnails posts "post_card" %}'
+            "{% for post in posts %}"
+            '{% thumbnail_preset post.image "post_card" as im %}'
+            "{{ im.url }};"
+            "{% endfor %}"
+        )
+        posts = [Post(image=name) for name in names + [""]]
+        with self.assertNumQueries(1):
+            rendered = template.render(Context({"posts": posts}))
+        self.assertEqual(
+            rendered,
+            f"{ready[0].url};{ready[1].url};/media/{names[2]};;",
+        )
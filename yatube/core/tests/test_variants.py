@@ -0,0 +1,113 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import variants
+from posts.images import record_variants
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(200, 10, 10)).save(buffer, "JPEG")
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    THUMBNAIL_WORKERS=0,
+    IMAGE_VARIANTS={
+        "post_card": {"widths": (100, 200, 400), "crop": (2, 1)},
+        "post_detail": {"widths": (100, 200, 400)},
+    },
+)
+class ImageVariantTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.name = default_storage.save(
+            "posts/photo.jpg", make_image((300, 300))
+        )
+        self.post = Post.objects.create(
+            author=User.objects.create_user(username="User"),
+            text="TEXT",
+            image=self.name,
+        )
+
+    def tearDown(self):
+        for directory in ("posts", variants.DIRECTORY):
+            shutil.rmtree(default_storage.path(directory), ignore_errors=True)
+
+    def render(self):
+        self.post.refresh_from_db()
+        return Template(
+            "{% load thumbnail_presets %}"
+            '{% responsive_image post.image "post_card" sizes="50vw" %}'
+        ).render(Context({"post": self.post}))
+
+    def test_generate_without_upscaling(self):
+        """Варианты шире кадра не создаются, кадр обрезается по пропорциям."""
+        described = variants.generate(self.name)
+        self.assertEqual(
+            described["post_card"]["jpeg"], [[100, 50], [200, 100]]
+        )
+        self.assertEqual(
+            described["post_detail"]["jpeg"], [[100, 100], [200, 200]]
+        )
+        name = variants.variant_name(self.name, "post_card", 200, "jpeg")
+        with default_storage.open(name) as file, Image.open(file) as image:
+            self.assertEqual(image.size, (200, 100))
+        self.assertEqual(
+            set(described["post_card"]), set(variants.formats())
+        )
+
+    def test_thumbnails_skip_variants(self):
+        """Миниатюры создаются только для исходников, не для вариантов."""
+        variants.generate(self.name)
+        out = StringIO()
+        call_command("pregenerate_thumbnails", workers=0, stdout=out)
+        self.assertIn("Картинок: 1,", out.getvalue())
+
+    def test_template_uses_recorded_variants(self):
+        """Тег выводит srcset из сведений поста, а до них -- исходник."""
+        html = self.render()
+        self.assertIn(f'src="/media/{self.name}"', html)
+        self.assertNotIn("srcset", html)
+        record_variants(self.name)
+        html = self.render()
+        self.assertIn('loading="lazy"', html)
+        self.assertIn(
+            'srcset="/media/variants/posts/photo.post_card.100w.jpg 100w, '
+            '/media/variants/posts/photo.post_card.200w.jpg 200w" '
+            'sizes="50vw"',
+            html,
+        )
+        self.assertIn('width="200" height="100"', html)
+        self.assertEqual(
+            json.loads(self.post.image_variants)["post_card"]["jpeg"][-1],
+            [200, 100],
+        )
+
+    def test_report_command(self):
+        """Отчёт считает байты вариантов против прежней миниатюры."""
+        call_command("generate_image_variants", workers=0, stdout=StringIO())
+        out = StringIO()
+        call_command("image_variants_report", slot=[150], stdout=out)
+        self.assertIn("Картинок с вариантами: 1", out.getvalue())
+        self.assertIn("слот   150 px", out.getvalue())
@@ -0,0 +1,168 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PresetBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который умеет только искать готовые миниатюры.
+
+    Имя миниатюры и её запись в KV-хранилище вычисляются так же, как в
+    get_thumbnail, но исходник не открывается и ничего не создаётся.
+    """
+
+    def _options(self, source, options):
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры, под которым её сохранил бы get_thumbnail."""
+        source = ImageFile(file_)
+        options = self._options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+
+backend = PresetBackend()
+
+
+def generate(name):
+    """Создаёт миниатюры всех THUMBNAIL_PRESETS для файла из хранилища."""
+    for geometry, options in settings.THUMBNAIL_PRESETS.values():
+        default.backend.get_thumbnail(name, geometry, **options)
+    return name
+
+
+def ready_thumbnail(image, preset):
+    """Готовая миниатюра или None, если её ещё не создали."""
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    return backend.get_ready_thumbnail(image, geometry, **dict(options))
+
+
+def ready_thumbnails(images, preset):
+    """Готовые миниатюры сразу для многих картинок: {имя исходника: миниатюра}.
+
+    Записи KV-хранилища sorl-thumbnail читаются одним get_many из кеша,
+    а не найденные там -- одним запросом к базе. Картинок без готовой
+    миниатюры в результате нет.
+    """
+    # Модуль импортируется процессами пула до django.setup(), поэтому
+    # модели sorl-thumbnail подключаются только здесь.
+    from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+    from sorl.thumbnail.models import KVStore
+
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    keys = {
+        add_prefix(backend.thumbnail_file(image, geometry, **options).key):
+        image.name
+        for image in images
+        if image
+    }
+    if not keys:
+        return {}
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStore.objects.filter(key__in=missing).values_list("key", "value")
+        )
+        kv_cache.set_many(stored, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(stored)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items()
+        if value != EMPTY_VALUE
+    }
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def make_pool(workers):
+    """Пул процессов для создания миниатюр.
+
+    Процессы запускаются через spawn: форк многопоточного веб-сервера
+    унаследовал бы его соединения с базой и захваченные блокировки.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(settings.SETTINGS_MODULE,),
+    )
+
+
+def get_pool():
+    """Общий пул процессов веб-сервера, создаётся при первой задаче."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_pool(settings.THUMBNAIL_WORKERS)
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error("Фоновая обработка картинки не удалась", exc_info=error)
+
+
+def submit(function, *args):
+    """Выполняет function(*args) на фоновом пуле процессов.
+
+    При THUMBNAIL_WORKERS = 0 функция вызывается сразу, в этом процессе.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        function(*args)
+        return
+    try:
+        future = get_pool().submit(function, *args)
+    except BrokenProcessPool:
+        # Упавший процесс ломает весь пул: заменяем его новым.
+        _discard_pool()
+        future = get_pool().submit(function, *args)
+    future.add_done_callback(_log_failure)
+
+
+def schedule(name):
+    """Ставит создание миниатюр файла в очередь фонового пула."""
+    submit(generate, name)
@@ -0,0 +1,36 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл, попутно считая SHA-256.
+
+    Файл не держится в памяти целиком ни при каком размере. Если
+    загрузка больше FILE_UPLOAD_MAX_BYTES, остаток не записывается, а
+    файл обрезается до нуля: size хранит заявленный размер, oversized
+    равен True, и любая проверка картинки такой файл отклонит.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_BYTES:
+            return None
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.oversized = file_size > settings.FILE_UPLOAD_MAX_BYTES
+        if upload.oversized:
+            upload.truncate(0)
+            upload.sha256 = None
+        else:
+            upload.sha256 = self.digest.hexdigest()
+        return upload
@@ -0,0 +1,148 @@
+import math
+import os
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+EXIF_ORIENTATION = 0x0112
+# Ориентации EXIF, при которых ширина и высота меняются местами.
+ROTATED = {5, 6, 7, 8}
+QUALITY = {"jpeg": 82, "webp": 80}
+MIME = {"jpeg": "image/jpeg", "webp": "image/webp"}
+EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+DIRECTORY = "variants"
+
+
+def formats():
+    """Форматы из IMAGE_VARIANT_FORMATS, которые Pillow может записать."""
+    return [
+        image_format
+        for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format == "jpeg" or features.check(image_format)
+    ]
+
+
+def variant_name(name, variant_set, width, image_format):
+    """Имя варианта в отдельном каталоге, чтобы обход исходников его не
+    задевал: variants/posts/cat.post_card.640w.webp."""
+    stem = os.path.splitext(name)[0]
+    return posixpath.join(
+        DIRECTORY,
+        f"{stem}.{variant_set}.{width}w.{EXTENSIONS[image_format]}",
+    )
+
+
+def _crop_box(size, crop):
+    """Центральная область size с пропорциями crop (или вся картинка)."""
+    width, height = size
+    if crop is None:
+        return 0, 0, width, height
+    ratio = crop[0] / crop[1]
+    crop_width = min(width, round(height * ratio))
+    crop_height = min(height, round(crop_width / ratio))
+    left = (width - crop_width) // 2
+    top = (height - crop_height) // 2
+    return left, top, left + crop_width, top + crop_height
+
+
+def _plan(size):
+    """Для каждого набора IMAGE_VARIANTS: область кадра и список
+    (ширина, высота) вариантов. Ширины больше кадра не создаются: если
+    исходник меньше самой узкой ширины, остаётся один вариант его
+    размера."""
+    plan = {}
+    for variant_set, config in settings.IMAGE_VARIANTS.items():
+        box = _crop_box(size, config.get("crop"))
+        box_width, box_height = box[2] - box[0], box[3] - box[1]
+        widths = [
+            width for width in sorted(config["widths"]) if width <= box_width
+        ]
+        plan[variant_set] = box, [
+            (width, max(1, round(box_height * width / box_width)))
+            for width in widths or [box_width]
+        ]
+    return plan
+
+
+def _scale(plan):
+    """Во сколько раз можно уменьшить исходник, не потеряв в качестве
+    ни одного варианта."""
+    return max(
+        sizes[-1][0] / (box[2] - box[0]) for box, sizes in plan.values()
+    )
+
+
+def _flatten(image):
+    """RGB-копия; прозрачные области становятся белыми, а не чёрными."""
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode == "RGB":
+        image.load()
+        return image
+    return image.convert("RGB")
+
+
+def _encode(image, image_format):
+    buffer = BytesIO()
+    image.save(buffer, image_format.upper(), quality=QUALITY[image_format])
+    return buffer.getvalue()
+
+
+def generate(name, storage=default_storage):
+    """Создаёт варианты IMAGE_VARIANTS картинки name во всех форматах.
+
+    JPEG декодируется через draft сразу уменьшенным до самого широкого
+    варианта, более узкие варианты уменьшаются из более широких.
+    Уже существующие файлы не перезаписываются. Возвращает сведения для
+    srcset: {набор: {формат: [[ширина, высота], ...]}}.
+    """
+    encoders = formats()
+    with storage.open(name, "rb") as file, Image.open(file) as source:
+        orientation = source.getexif().get(EXIF_ORIENTATION, 1)
+        size = source.size[::-1] if orientation in ROTATED else source.size
+        scale = _scale(_plan(size))
+        source.draft(
+            "RGB", tuple(math.ceil(side * scale) for side in source.size)
+        )
+        image = source
+        if orientation != 1:
+            image = ImageOps.exif_transpose(source)
+        image = _flatten(image)
+    plan = _plan(size)
+    # Draft мог уменьшить картинку: переносим кадры на её размер.
+    factor = image.size[0] / size[0]
+    described = {}
+    for variant_set, (box, sizes) in plan.items():
+        frame = image.crop(tuple(round(side * factor) for side in box))
+        # От широких к узким: каждый вариант уменьшается из предыдущего,
+        # а не из полного кадра.
+        for width, height in reversed(sizes):
+            frame = frame.resize((width, height), Image.LANCZOS)
+            for image_format in encoders:
+                target = variant_name(name, variant_set, width, image_format)
+                if not storage.exists(target):
+                    storage.save(
+                        target, ContentFile(_encode(frame, image_format))
+                    )
+        described[variant_set] = {
+            image_format: [list(pair) for pair in sizes]
+            for image_format in encoders
+        }
+    return described
+
+
+def srcset(name, variant_set, image_format, sizes, storage=default_storage):
+    """Строка srcset по сохранённым сведениям, без обращений к хранилищу
+    кроме построения URL."""
+    return ", ".join(
+        f"{storage.url(variant_name(name, variant_set, width, image_format))}"
+        f" {width}w"
+        for width, _ in sizes
+    )
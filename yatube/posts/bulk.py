@@ -0,0 +1,99 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import connection
+
+from core.cache import pages
+from . import caching, counters, search, timeline
+from .models import Counter, Post
+
+# Сколько id передаётся в одном IN: SQLite ограничивает число
+# параметров запроса.
+IDS_CHUNK_SIZE = 500
+
+
+@contextmanager
+def explicit_dates():
+    """bulk_create постов с датами из данных: pub_date и updated не
+    перезаписываются текущим временем."""
+    pub_date = Post._meta.get_field("pub_date")
+    updated = Post._meta.get_field("updated")
+    saved = pub_date.auto_now_add, updated.auto_now
+    pub_date.auto_now_add = updated.auto_now = False
+    try:
+        yield
+    finally:
+        pub_date.auto_now_add, updated.auto_now = saved
+
+
+def reserve_ids(count):
+    """Занимает для постов count id подряд и возвращает их.
+
+    bulk_create в SQLite не возвращает id вставленных строк, а Max(pk)
+    после вставки ошибается, если кто-то пишет параллельно. UPDATE
+    sqlite_sequence берёт блокировку записи, а следующие AUTOINCREMENT
+    начнутся после занятых id. Вызывается внутри транзакции.
+    """
+    table = Post._meta.db_table
+    latest = f"SELECT COALESCE(MAX(id), 0) FROM {table}"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE sqlite_sequence SET seq = MAX(seq, ({latest})) + %s "
+            "WHERE name = %s",
+            [count, table],
+        )
+        if not cursor.rowcount:
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) "
+                f"SELECT %s, ({latest}) + %s",
+                [table, count],
+            )
+        cursor.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = %s", [table]
+        )
+        last = cursor.fetchone()[0]
+    return list(range(last - count + 1, last + 1))
+
+
+def create_posts(posts):
+    """bulk_create постов; возвращает их id в том же порядке."""
+    if not connection.features.can_return_ids_from_bulk_insert:
+        for post, pk in zip(posts, reserve_ids(len(posts))):
+            post.pk = pk
+    Post.objects.bulk_create(posts)
+    return [post.pk for post in posts]
+
+
+def after_insert(post_ids):
+    """То, что при save() делают сигналы, для постов post_ids,
+    вставленных через bulk_create: полнотекстовый индекс, счётчики и
+    ленты подписчиков -- несколькими запросами на пачку постов.
+
+    Возвращает авторов и группы вставленных постов.
+    """
+    authors = defaultdict(int)
+    groups = defaultdict(int)
+    for start in range(0, len(post_ids), IDS_CHUNK_SIZE):
+        chunk = post_ids[start:start + IDS_CHUNK_SIZE]
+        posts = Post.objects.filter(pk__in=chunk)
+        for author_id, group_id in posts.values_list(
+            "author_id", "group_id"
+        ):
+            authors[author_id] += 1
+            groups[group_id] += 1
+        search.index_posts(chunk)
+        timeline.fan_out_posts(posts)
+    counters.change(Counter.POSTS, 0, sum(authors.values()))
+    counters.change_many(Counter.AUTHOR_POSTS, authors)
+    counters.change_many(Counter.GROUP_POSTS, groups)
+    return set(authors), set(groups) - {None}
+
+
+def purge_pages(author_ids, group_ids):
+    """Сбрасывает кеши списков, в которые попали новые посты."""
+    caching.bump_posts_version()
+    pages.purge(
+        caching.POSTS_PAGES,
+        *(caching.AUTHOR_POSTS_PAGES.format(pk=pk) for pk in author_ids),
+        *(caching.GROUP_POSTS_PAGES.format(pk=pk) for pk in group_ids),
+    )
@@ -0,0 +1,142 @@
+import time
+
+from django.core.cache import cache, caches
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from core.cache import pages
+from core.cache.stampede import get_or_compute
+
+from .models import Group, User
+
+POSTS_VERSION_KEY = "posts:version"
+POSTS_CHANGED_KEY = "posts:changed"
+COMMENTS_VERSION_KEY = "posts:comments-version:{pk}"
+GROUP_KEY = "posts:group:{slug}"
+AUTHOR_KEY = "posts:author:{username}"
+HOT_TIMEOUT = 300
+# Суррогатные ключи кеша страниц: от чего зависит страница.
+POSTS_PAGES = "posts"
+POST_PAGES = "post:{pk}"
+COMMENTS_PAGES = "comments:{pk}"
+GROUP_PAGES = "group:{pk}"
+GROUP_POSTS_PAGES = "group-posts:{pk}"
+AUTHOR_PAGES = "author:{pk}"
+AUTHOR_POSTS_PAGES = "author-posts:{pk}"
+# В кеш попадают только поля, нужные страницам автора, без хеша пароля.
+AUTHOR_FIELDS = ("id", "username", "first_name", "last_name")
+
+
+def _version(key):
+    """Версия из кеша. Если ключ вытеснен, новая версия берётся от
+    текущего времени, чтобы не совпасть ни с одной из выданных раньше."""
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def posts_version():
+    """Версия списков постов, входящая в их ETag."""
+    return _version(POSTS_VERSION_KEY)
+
+
+def comments_version(post_id):
+    """Версия комментариев поста для ETag его страницы: меняется и при
+    правке комментария, когда их число остаётся прежним."""
+    return _version(COMMENTS_VERSION_KEY.format(pk=post_id))
+
+
+def bump_comments_version(post_id):
+    _bump(COMMENTS_VERSION_KEY.format(pk=post_id))
+
+
+def posts_changed():
+    """Время последнего изменения списков постов для Last-Modified.
+
+    Как и версия, при потере ключа начинается заново от текущего момента:
+    клиенты лишний раз получат страницу целиком, но не устаревшую.
+    """
+    changed = cache.get(POSTS_CHANGED_KEY)
+    if changed is None:
+        changed = timezone.now()
+        if not cache.add(POSTS_CHANGED_KEY, changed, None):
+            changed = cache.get(POSTS_CHANGED_KEY, changed)
+    return changed
+
+
+def bump_posts_version():
+    """Меняет версию и время изменения списков постов: их ETag и
+    Last-Modified перестают совпадать с выданными раньше."""
+    _bump(POSTS_VERSION_KEY)
+    cache.set(POSTS_CHANGED_KEY, timezone.now(), None)
+
+
+def _get_hot(key, queryset, **lookup):
+    """Объект из горячего кеша или из базы; отсутствующие не кешируются."""
+    return get_or_compute(
+        key,
+        lambda: get_object_or_404(queryset, **lookup),
+        HOT_TIMEOUT,
+        cache=caches["hot"],
+    )
+
+
+def get_group(slug):
+    return _get_hot(GROUP_KEY.format(slug=slug), Group, slug=slug)
+
+
+def get_author(username):
+    return _get_hot(
+        AUTHOR_KEY.format(username=username),
+        User.objects.only(*AUTHOR_FIELDS),
+        username=username,
+    )
+
+
+def forget_group(group):
+    caches["hot"].delete(GROUP_KEY.format(slug=group.slug))
+
+
+def forget_author(user):
+    caches["hot"].delete(AUTHOR_KEY.format(username=user.username))
+
+
+def page_keys(posts):
+    """Ключи страницы со списком posts: сами посты, их авторы и группы."""
+    keys = set()
+    for post in posts:
+        keys.add(POST_PAGES.format(pk=post.pk))
+        keys.add(AUTHOR_PAGES.format(pk=post.author_id))
+        if post.group_id:
+            keys.add(GROUP_PAGES.format(pk=post.group_id))
+    return keys
+
+
+def purge_post_pages(post, group_ids=(), listed=False):
+    """Сбрасывает страницы с постом; listed -- пост появился в списках
+    или исчез из них, group_ids -- группы, чьи списки изменились.
+
+    Комментарии выводятся только на странице поста (ключ COMMENTS_PAGES),
+    ни в карточках, ни в профиле комментатора их нет, поэтому новый
+    комментарий профили не сбрасывает. Имена комментаторов на странице
+    поста сбрасываются по их ключам AUTHOR_PAGES.
+    """
+    keys = [POST_PAGES.format(pk=post.pk)]
+    keys += [
+        GROUP_POSTS_PAGES.format(pk=group_id)
+        for group_id in group_ids
+        if group_id is not None
+    ]
+    if listed:
+        keys += [POSTS_PAGES, AUTHOR_POSTS_PAGES.format(pk=post.author_id)]
+    pages.purge(*keys)
@@ -0,0 +1,69 @@
+import hashlib
+
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from core.templatetags.thumbnail_presets import (
+    PREFETCHED,
+    prefetch_thumbnails,
+)
+
+CARD_TEMPLATE = "includes/post_list.html"
+CARD_KEY = "posts:card:{pk}:{digest}"
+CARD_TIMEOUT = 24 * 60 * 60
+PRESET = "post_card"
+
+
+def card_key(post, thumbnail, show_group, show_author):
+    """Ключ карточки поста. В него входит всё, от чего зависит HTML:
+    дата изменения поста, группа, автор и готовая миниатюра, поэтому
+    старые карточки не нужно удалять -- они просто перестают читаться."""
+    author = post.author
+    parts = (
+        post.updated.isoformat(),
+        post.group.slug if post.group_id else "",
+        author.username,
+        author.get_full_name(),
+        thumbnail,
+        show_group,
+        show_author,
+    )
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return CARD_KEY.format(pk=post.pk, digest=digest)
+
+
+def render_cards(posts, show_group=False, author=None):
+    """HTML карточек постов страницы в том же порядке, что и posts.
+
+    Готовые карточки читаются из кеша одним get_many, шаблон рендерится
+    только для тех, что изменились или ещё не кешировались.
+    """
+    posts = list(posts)
+    context = {}
+    prefetch_thumbnails(context, posts, PRESET)
+    prefetched = context[PREFETCHED]
+    keys = {}
+    for post in posts:
+        thumbnail = prefetched.get((PRESET, post.image.name))
+        keys[post.pk] = card_key(
+            post, thumbnail.name if thumbnail else "", show_group, not author
+        )
+    cache = caches["hot"]
+    cards = cache.get_many(list(keys.values()))
+    missing = {}
+    template = get_template(CARD_TEMPLATE)
+    for post in posts:
+        key = keys[post.pk]
+        if key not in cards:
+            cards[key] = missing[key] = template.render(
+                {
+                    "post": post,
+                    "show_group": show_group,
+                    "author": author,
+                    PREFETCHED: prefetched,
+                }
+            )
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+    return [mark_safe(cards[keys[post.pk]]) for post in posts]
@@ -0,0 +1,95 @@
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+
+from . import counters
+from .caching import (
+    comments_version,
+    get_author,
+    get_group,
+    posts_changed,
+    posts_version,
+)
+from .models import Counter, Follow, Post
+
+
+def _etag(request, *parts):
+    """ETag из частей, от которых зависит страница. Страница вошедшего
+    пользователя зависит ещё от его имени в шапке и CSRF-токена форм."""
+    user = request.user
+    if user.is_authenticated:
+        parts += (user.pk, user.username, request.META.get("CSRF_COOKIE"))
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def posts_last_modified(request, *args, **kwargs):
+    """Last-Modified лент -- только для анонимных посетителей: страница
+    вошедшего пользователя меняется и без изменения постов."""
+    if request.user.is_authenticated:
+        return None
+    return posts_changed()
+
+
+def index_etag(request):
+    # posts_version меняется и при изменении авторов и групп: их имена
+    # выводятся в карточках постов.
+    return _etag(request, "index", posts_version())
+
+
+def group_etag(request, slug):
+    group = get_group(slug)
+    return _etag(
+        request,
+        "group",
+        posts_version(),
+        group.pk,
+        group.title,
+        group.description,
+    )
+
+
+def profile_etag(request, username):
+    author = get_author(username)
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
+    return _etag(
+        request,
+        "profile",
+        posts_version(),
+        author.pk,
+        author.username,
+        author.get_full_name(),
+        following,
+    )
+
+
+def post_detail_etag(request, post_id):
+    """Дата изменения поста, имена автора и группы и счётчик комментариев
+    одним запросом; число постов автора меняется вместе с версией
+    списков, а правка комментария -- с версией комментариев поста. Для
+    несуществующего поста ETag нет -- представление ответит 404."""
+    comments = Counter.objects.filter(
+        kind=Counter.POST_COMMENTS, object_id=OuterRef("pk")
+    ).values("value")
+    row = (
+        Post.objects.filter(pk=post_id)
+        .annotate(comments_count=Subquery(comments[:1]))
+        .values_list(
+            "updated",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+            "group__title",
+            "comments_count",
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    if row[-1] is None:
+        row = row[:-1] + (counters.value(Counter.POST_COMMENTS, post_id),)
+    return _etag(
+        request, "post", posts_version(), comments_version(post_id), row
+    )
@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+from django.db.models import F
+
+from .models import Comment, Counter, Follow, Post
+
+CHANGE_BATCH_SIZE = 500
+SOURCES = {
+    Counter.POSTS: (Post, None),
+    Counter.AUTHOR_POSTS: (Post, "author_id"),
+    Counter.GROUP_POSTS: (Post, "group_id"),
+    Counter.POST_COMMENTS: (Comment, "post_id"),
+    Counter.FOLLOWERS: (Follow, "author_id"),
+    Counter.FOLLOWING: (Follow, "user_id"),
+}
+
+
+def source(kind, object_id=None):
+    """Строки, которые считает счётчик; без object_id — для всех объектов."""
+    model, field = SOURCES[kind]
+    rows = model.objects.order_by()
+    if field is not None and object_id is not None:
+        rows = rows.filter(**{field: object_id})
+    return rows
+
+
+def change(kind, object_id, delta):
+    """Атомарно сдвигает счётчик на delta.
+
+    Отсутствующий счётчик не создаётся: он будет посчитан при первом
+    чтении.
+    """
+    if object_id is None:
+        return
+    Counter.objects.filter(kind=kind, object_id=object_id).update(
+        value=F("value") + delta
+    )
+
+
+def change_many(kind, deltas):
+    """Сдвигает счётчики сразу многих объектов: deltas -- словарь
+    object_id -> delta. Объекты с одинаковым сдвигом обновляются одним
+    запросом на CHANGE_BATCH_SIZE объектов."""
+    by_delta = defaultdict(list)
+    for object_id, delta in deltas.items():
+        if object_id is not None:
+            by_delta[delta].append(object_id)
+    for delta, object_ids in by_delta.items():
+        for start in range(0, len(object_ids), CHANGE_BATCH_SIZE):
+            Counter.objects.filter(
+                kind=kind,
+                object_id__in=object_ids[start:start + CHANGE_BATCH_SIZE],
+            ).update(value=F("value") + delta)
+
+
+def value(kind, object_id=0):
+    """Значение счётчика; отсутствующий считается по базе и сохраняется."""
+    try:
+        return Counter.objects.values_list("value", flat=True).get(
+            kind=kind, object_id=object_id
+        )
+    except Counter.DoesNotExist:
+        actual = source(kind, object_id).count()
+        Counter.objects.bulk_create(
+            [Counter(kind=kind, object_id=object_id, value=actual)],
+            ignore_conflicts=True,
+        )
+        return actual
+
+
+def forget(kinds, object_id):
+    """Удаляет счётчики удалённого объекта."""
+    Counter.objects.filter(kind__in=kinds, object_id=object_id).delete()
+
+
+def count_post(post, delta):
+    change(Counter.POSTS, 0, delta)
+    change(Counter.AUTHOR_POSTS, post.author_id, delta)
+    change(Counter.GROUP_POSTS, post.group_id, delta)
+
+
+def count_follow(follow, delta):
+    change(Counter.FOLLOWERS, follow.author_id, delta)
+    change(Counter.FOLLOWING, follow.user_id, delta)
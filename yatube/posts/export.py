@@ -0,0 +1,120 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Post
+
+FORMATS = ("jsonl", "csv")
+CONTENT_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_SIZE = 1000
+ENCODER = DjangoJSONEncoder
+# Набор данных: модель, поле с датой изменения для --since и колонки
+# в виде (имя, путь к полю).
+DATASETS = {
+    "posts": (
+        Post,
+        "updated",
+        [
+            ("id", "pk"),
+            ("author", "author__username"),
+            ("group", "group__slug"),
+            ("text", "text"),
+            ("image", "image"),
+            ("pub_date", "pub_date"),
+            ("updated", "updated"),
+        ],
+    ),
+    "comments": (
+        Comment,
+        "pub_date",
+        [
+            ("id", "pk"),
+            ("post", "post_id"),
+            ("author", "author__username"),
+            ("text", "text"),
+            ("pub_date", "pub_date"),
+        ],
+    ),
+    "follows": (
+        Follow,
+        "created",
+        [
+            ("id", "pk"),
+            ("user", "user__username"),
+            ("author", "author__username"),
+            ("created", "created"),
+        ],
+    ),
+}
+
+
+def parse_since(value):
+    """Время из ISO 8601; без часового пояса -- в поясе сайта."""
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f"Неверное время: {value!r}")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def rows(dataset, since=None, chunk_size=CHUNK_SIZE):
+    """Строки набора данных по порядку id: каждая часть выбирается
+    отдельным запросом от последнего id предыдущей, так что в памяти
+    не больше chunk_size строк. С since -- только изменённые позже."""
+    model, changed, columns = DATASETS[dataset]
+    queryset = model.objects.order_by("pk")
+    if since is not None:
+        queryset = queryset.filter(**{f"{changed}__gt": since})
+    queryset = queryset.values_list(*(path for _, path in columns))
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+        yield chunk
+
+
+class _Line:
+    """Файл для csv.writer, который возвращает записанное."""
+
+    def write(self, line):
+        return line
+
+
+def lines(dataset, format, since=None, chunk_size=CHUNK_SIZE):
+    """Набор данных в JSONL или CSV: по куску текста на часть строк."""
+    names = [name for name, _ in DATASETS[dataset][2]]
+    if format == "csv":
+        writer = csv.writer(_Line())
+        yield writer.writerow(names)
+    for chunk in rows(dataset, since, chunk_size):
+        if format == "csv":
+            yield "".join(writer.writerow(row) for row in chunk)
+            continue
+        yield "".join(
+            json.dumps(dict(zip(names, row)), cls=ENCODER, ensure_ascii=False)
+            + "\n"
+            for row in chunk
+        )
+
+
+def encode(chunks, compress=False):
+    """Куски текста в байтах UTF-8, при compress -- сжатые в gzip на
+    лету."""
+    compressor = None
+    if compress:
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = chunk.encode()
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
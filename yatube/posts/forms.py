@@ -2,7 +2,11 @@ from django.forms import ModelForm
 from django import forms
 
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 
+from core import thumbnails
+from . import images
 from .models import Post, Comment
 
 User = get_user_model()
@@ -13,6 +17,40 @@ class PostForm(ModelForm):
         model = Post
         fields = ("text", "group", "image")
 
+    def clean_image(self):
+        image = self.cleaned_data["image"]
+        if isinstance(image, UploadedFile):
+            try:
+                image = images.prepare_upload(image)
+            except images.ImageRejected as error:
+                raise forms.ValidationError(str(error), code="rejected")
+        return image
+
+    def clean(self):
+        # Слишком большой файл HashingUploadHandler обрезает до нуля, и
+        # поле отклоняет его как «не картинку»; объясняем настоящую
+        # причину.
+        upload = self.files.get(self.add_prefix("image"))
+        if getattr(upload, "oversized", False):
+            self.errors.pop("image", None)
+            try:
+                images.prepare_upload(upload)
+            except images.ImageRejected as error:
+                self.add_error("image", str(error))
+        return super().clean()
+
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and "image" in self.changed_data and post.image:
+            name = post.image.name
+            with_variants = not post.image_variants
+            transaction.on_commit(
+                lambda: thumbnails.submit(
+                    images.process_upload, name, with_variants
+                )
+            )
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
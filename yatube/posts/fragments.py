@@ -0,0 +1,48 @@
+from django.template.loader import render_to_string
+
+from core import fragments
+
+from .caching import get_author
+from .forms import CommentForm
+from .models import Follow
+
+
+@fragments.register("feed_switcher")
+def feed_switcher(request, view_name):
+    return render_to_string(
+        "posts/includes/switcher.html", {"view_name": view_name}, request
+    )
+
+
+@fragments.register("follow_button")
+def follow_button(request, username):
+    author = get_author(username)
+    user = request.user
+    if not user.is_authenticated or user.pk == author.pk:
+        return ""
+    following = Follow.objects.filter(user=user, author=author).exists()
+    return render_to_string(
+        "posts/includes/follow_button.html",
+        {"author": author, "following": following},
+        request,
+    )
+
+
+@fragments.register("comment_form")
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ""
+    return render_to_string(
+        "includes/comment_form.html",
+        {"form": CommentForm(), "post_id": post_id},
+        request,
+    )
+
+
+@fragments.register("post_edit_link")
+def post_edit_link(request, post_id, author_id):
+    if str(request.user.pk) != author_id:
+        return ""
+    return render_to_string(
+        "posts/includes/post_edit_link.html", {"post_id": post_id}, request
+    )
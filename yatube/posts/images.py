@@ -0,0 +1,271 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps
+
+from core import thumbnails, variants
+from core.cache import pages
+from .caching import POST_PAGES, bump_posts_version
+from .models import Post
+
+HASH_CHUNK_SIZE = 64 * 1024
+PLACEHOLDER_SIZE = (16, 16)
+PLACEHOLDER_BLUR = 1
+NORMALIZED_QUALITY = 90
+EXIF_ORIENTATION = 0x0112
+PNG_MODES = {"1", "L", "LA", "I", "P", "RGB", "RGBA"}
+# Чем кончается чтение сохранённой картинки, если файла нет, он не
+# картинка или в нём слишком много пикселей.
+UNREADABLE = (
+    OSError,
+    Image.UnidentifiedImageError,
+    Image.DecompressionBombError,
+)
+
+
+class ImageRejected(ValueError):
+    """Загруженная картинка не принимается; текст -- для пользователя."""
+
+
+def _placeholder(image):
+    """Крошечное размытое JPEG-превью в виде data URI."""
+    preview = image.convert("RGB")
+    preview.thumbnail(PLACEHOLDER_SIZE)
+    preview = preview.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR))
+    buffer = BytesIO()
+    preview.save(buffer, "JPEG", quality=40)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def _hash(file):
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def describe(file):
+    """Размеры, размер в байтах, SHA-256 и превью картинки.
+
+    Файл читается потоком по HASH_CHUNK_SIZE байт, а Pillow декодирует
+    его в уменьшенном виде (draft), так что большие картинки целиком в
+    память не попадают. SHA-256, посчитанный HashingUploadHandler при
+    загрузке, а также размеры и превью, записанные prepare_upload,
+    берутся готовыми.
+    """
+    sha256 = getattr(file, "sha256", None)
+    if sha256:
+        size = file.size
+    else:
+        size, sha256 = _hash(file)
+    placeholder = getattr(file, "placeholder", None)
+    if placeholder:
+        width, height = file.dimensions
+    else:
+        file.seek(0)
+        with Image.open(file) as image:
+            width, height = image.size
+            image.draft("RGB", PLACEHOLDER_SIZE)
+            placeholder = _placeholder(image)
+    file.seek(0)
+    return {
+        "image_width": width,
+        "image_height": height,
+        "image_size": size,
+        "image_hash": sha256,
+        "image_placeholder": placeholder,
+    }
+
+
+def clear(post):
+    post.image_width = post.image_height = post.image_size = None
+    post.image_hash = post.image_placeholder = post.image_variants = ""
+
+
+def record_upload(post):
+    """Заполняет сведения о только что загруженной картинке поста.
+
+    Если такая же картинка уже сохранена у другого поста, пост
+    ссылается на её файл, и новая копия в хранилище не записывается.
+    """
+    if not post.image:
+        clear(post)
+        return
+    if post.image._committed:
+        return
+    for field, value in describe(post.image.file).items():
+        setattr(post, field, value)
+    post.image_variants = ""
+    duplicate = (
+        type(post)
+        .objects.filter(image_hash=post.image_hash)
+        .exclude(image="")
+        .exclude(pk=post.pk)
+        .values_list("image", "image_variants")
+        .first()
+    )
+    if duplicate:
+        post.image, post.image_variants = duplicate
+
+
+def process_upload(name, with_variants):
+    """Фоновая обработка загруженной картинки одной задачей пула:
+    миниатюры THUMBNAIL_PRESETS и, если with_variants, варианты для
+    srcset.
+
+    Исходник здесь читается дважды. Миниатюры создаёт движок
+    sorl-thumbnail: он сам открывает файл и записывает их в своё
+    KV-хранилище. Варианты же декодируются через draft сразу
+    уменьшенными. Картинку, декодированную при загрузке, сюда не
+    передать дешевле чтения файла: её пиксели пришлось бы целиком
+    сериализовать в процесс пула.
+    """
+    thumbnails.generate(name)
+    if with_variants:
+        record_variants(name)
+
+
+def record_variants(name):
+    """Создаёт варианты картинки для srcset и записывает сведения о них
+    всем постам с этим файлом. Выполняется на фоновом пуле."""
+    described = json.dumps(variants.generate(name), separators=(",", ":"))
+    posts = Post.objects.filter(image=name)
+    posts.update(image_variants=described, updated=timezone.now())
+    # Страницы с этой картинкой изменились: сбрасываем их кеш и ETag.
+    bump_posts_version()
+    pages.purge(
+        *(
+            POST_PAGES.format(pk=pk)
+            for pk in posts.values_list("pk", flat=True)
+        )
+    )
+
+
+def _metadata_size(image):
+    """Сколько байт занимают метаданные: APP-сегменты JPEG или чанки
+    с текстом и ICC-профилем у остальных форматов."""
+    segments = getattr(image, "applist", None)
+    if segments is not None:
+        return sum(len(data) for _, data in segments)
+    return sum(
+        len(value)
+        for value in image.info.values()
+        if isinstance(value, (bytes, str))
+    )
+
+
+def _remember(upload, image, dimensions):
+    """Записывает в файл загрузки размеры и превью картинки, которую
+    prepare_upload уже декодировал: describe() возьмёт их готовыми."""
+    upload.dimensions = dimensions
+    upload.placeholder = _placeholder(image)
+
+
+def _check_decodes(image):
+    """Декодирует JPEG в масштабе 1/8: verify() формы JPEG не проверяет,
+    а обрезанный или битый файл иначе всплыл бы только в миниатюрах."""
+    if image.format != "JPEG":
+        return
+    width, height = image.size
+    image.draft("RGB", (width // 8, height // 8))
+    image.load()
+
+
+def _normalize(image, name):
+    """Копия картинки не больше IMAGE_MAX_SIDE по длинной стороне, с
+    применённым поворотом из EXIF и без метаданных.
+
+    JPEG декодируется через draft сразу уменьшенным в 2, 4 или 8 раз,
+    если обе стороны остаются не меньше нужных. Результат пишется в
+    безымянный временный файл, который хранилище копирует, а не
+    перемещает.
+    """
+    source_format = image.format
+    side = settings.IMAGE_MAX_SIDE
+    scale = side / max(image.size)
+    image.draft("RGB", tuple(int(length * scale) for length in image.size))
+    image.thumbnail((side, side), Image.LANCZOS)
+    if image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+    if source_format == "JPEG" or image.mode == "CMYK":
+        image_format, extension = "JPEG", ".jpg"
+        if image.mode not in ("L", "RGB", "CMYK"):
+            image = image.convert("RGB")
+    else:
+        image_format, extension = "PNG", ".png"
+        if image.mode not in PNG_MODES:
+            image = image.convert("RGBA")
+    stem = os.path.splitext(os.path.basename(name))[0]
+    normalized = UploadedFile(
+        tempfile.TemporaryFile(), stem + extension, Image.MIME[image_format]
+    )
+    image.save(
+        normalized.file,
+        image_format,
+        quality=NORMALIZED_QUALITY,
+        icc_profile=None,
+    )
+    normalized.size = normalized.tell()
+    normalized.seek(0)
+    _remember(normalized, image, image.size)
+    return normalized
+
+
+def _open(upload):
+    """Открывает картинку, читая только заголовок, и проверяет число
+    пикселей до декодирования."""
+    max_pixels = settings.IMAGE_MAX_PIXELS
+    too_large = ImageRejected(
+        f"Картинка больше {max_pixels / 10 ** 6:g} мегапикселей."
+    )
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except Image.DecompressionBombError:
+        raise too_large
+    except OSError:
+        raise ImageRejected("Не удалось прочитать картинку.")
+    width, height = image.size
+    if width * height > max_pixels:
+        image.close()
+        raise too_large
+    return image
+
+
+def prepare_upload(upload):
+    """Проверяет загруженную картинку и при необходимости уменьшает её.
+
+    Размер файла и число пикселей проверяются до декодирования. Картинки
+    со стороной больше IMAGE_MAX_SIDE или с метаданными больше
+    IMAGE_MAX_METADATA_BYTES заменяются уменьшенной копией без
+    метаданных, остальные возвращаются как есть.
+    """
+    limit = settings.FILE_UPLOAD_MAX_BYTES
+    if getattr(upload, "oversized", False) or upload.size > limit:
+        raise ImageRejected(f"Файл больше {filesizeformat(limit)}.")
+    with _open(upload) as image:
+        try:
+            if (
+                max(image.size) > settings.IMAGE_MAX_SIDE
+                or _metadata_size(image) > settings.IMAGE_MAX_METADATA_BYTES
+            ):
+                return _normalize(image, upload.name)
+            dimensions = image.size
+            _check_decodes(image)
+            _remember(upload, image, dimensions)
+        except OSError:
+            raise ImageRejected("Файл картинки повреждён.")
+    upload.seek(0)
+    return upload
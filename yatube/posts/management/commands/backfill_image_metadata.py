@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.cache import pages
+from posts.caching import POST_PAGES, bump_posts_version
+from posts.images import UNREADABLE, describe
+from posts.models import Post
+
+FIELDS = [
+    "image_width",
+    "image_height",
+    "image_size",
+    "image_hash",
+    "image_placeholder",
+    "updated",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет размеры, размер в байтах, SHA-256 и превью картинок "
+        "у постов, загруженных до появления этих полей."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько постов обновлять в одной транзакции.",
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        posts = (
+            Post.objects.exclude(image="")
+            .filter(image_hash="")
+            .order_by("pk")
+            .only("pk", "image")
+        )
+        last_pk = 0
+        updated = skipped = 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            done, failed = self.backfill_chunk(chunk)
+            updated += done
+            skipped += failed
+            self.stdout.write(f"Обработано постов: {updated + skipped}")
+        if updated:
+            bump_posts_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: заполнено {updated}, "
+                f"пропущено (нет файла или не картинка) {skipped}."
+            )
+        )
+
+    @transaction.atomic
+    def backfill_chunk(self, posts):
+        described = {}
+        filled = []
+        now = timezone.now()
+        for post in posts:
+            name = post.image.name
+            if name not in described:
+                try:
+                    with post.image.open("rb") as file:
+                        described[name] = describe(file)
+                except UNREADABLE as error:
+                    self.stderr.write(f"{name}: {error}")
+                    described[name] = None
+            if described[name] is None:
+                continue
+            for field, value in described[name].items():
+                setattr(post, field, value)
+            # bulk_update не обновляет auto_now, а от даты изменения
+            # зависит ключ кеша карточки поста.
+            post.updated = now
+            filled.append(post)
+        Post.objects.bulk_update(filled, FIELDS)
+        pages.purge(*(POST_PAGES.format(pk=post.pk) for post in filled))
+        return len(filled), len(posts) - len(filled)
@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, Post, User
+from posts.views import NUMBERS_OF_POSTS
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает чтение ленты подписок через JOIN и через "
+        "материализованную ленту. Данные создаются во временной "
+        "транзакции и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--authors",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1000],
+            help="Количества авторов в подписках.",
+        )
+        parser.add_argument("--posts-per-author", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'авторов':>8} {'join, мс':>10} {'лента, мс':>10}")
+        for authors in options["authors"]:
+            join_ms, timeline_ms = self.run_case(
+                authors, options["posts_per_author"], options["repeat"]
+            )
+            self.stdout.write(
+                f"{authors:>8} {join_ms:>10.3f} {timeline_ms:>10.3f}"
+            )
+
+    def run_case(self, authors, posts_per_author, repeat):
+        with transaction.atomic():
+            reader = self.populate(authors, posts_per_author)
+            join_ms = self.measure(
+                lambda: list(
+                    Post.objects.filter(author__following__user=reader)[
+                        :NUMBERS_OF_POSTS
+                    ]
+                ),
+                repeat,
+            )
+            timeline_ms = self.measure(
+                lambda: [
+                    entry.post
+                    for entry in timeline.timeline_for(reader).order_by(
+                        "-pub_date", "-post_id"
+                    )[:NUMBERS_OF_POSTS]
+                ],
+                repeat,
+            )
+            transaction.set_rollback(True)
+        return join_ms, timeline_ms
+
+    def populate(self, authors, posts_per_author):
+        reader = User.objects.create(username="bench_reader")
+        User.objects.bulk_create(
+            User(username=f"bench_author_{number}")
+            for number in range(authors)
+        )
+        author_ids = list(
+            User.objects.filter(
+                username__startswith="bench_author_"
+            ).values_list("pk", flat=True)
+        )
+        Post.objects.bulk_create(
+            (
+                Post(author_id=author_id, text=f"bench {number}")
+                for author_id in author_ids
+                for number in range(posts_per_author)
+            ),
+            batch_size=100,
+        )
+        Follow.objects.bulk_create(
+            Follow(user=reader, author_id=author_id)
+            for author_id in author_ids
+        )
+        for author_id in author_ids:
+            timeline.backfill(reader.pk, author_id)
+        return reader
+
+    @staticmethod
+    def measure(read, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            read()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
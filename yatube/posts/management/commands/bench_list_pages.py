@@ -0,0 +1,108 @@
+import random
+import tracemalloc
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Template
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.views import NUMBERS_OF_POSTS
+
+# Как выводился текст в ленте раньше и как выводится теперь.
+FULL_TEXT = Template(
+    "{% for post in posts %}{{ post.text|linebreaksbr }}{% endfor %}"
+)
+EXCERPT = Template(
+    "{% for post in posts %}{{ post.excerpt|linebreaksbr }}{% endfor %}"
+)
+
+
+def _paragraphs(generator, size):
+    words = []
+    length = 0
+    while length < size:
+        word = "".join(
+            generator.choice("абвгдеёжзийклмнопрстуфхцчшщьыэюя")
+            for _ in range(generator.randint(2, 10))
+        )
+        words.append(word + ("\n\n" if generator.random() < 0.02 else " "))
+        length += len(words[-1])
+    return "".join(words)
+
+
+def _peak(load):
+    """Пиковая память Python (КБ), пока load() читает страницу."""
+    tracemalloc.start()
+    try:
+        rows = load()
+        return rows, tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает память и размер ответа ленты с полным текстом постов "
+        "и с началом текста. Данные создаются во временной транзакции и "
+        "откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=200)
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=40000,
+            help="Длина текста поста в символах.",
+        )
+
+    def handle(self, *args, posts, size, **options):
+        with transaction.atomic():
+            self.populate(posts, size)
+            self.report()
+            transaction.set_rollback(True)
+
+    def populate(self, posts, size):
+        author = User.objects.create(username="bench_list_author")
+        group = Group.objects.create(
+            title="bench", slug="bench_list_group", description=""
+        )
+        generator = random.Random(0)
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author=author,
+                    group=group,
+                    text=_paragraphs(generator, size),
+                )
+                for _ in range(posts)
+            ),
+            batch_size=100,
+        )
+
+    def report(self):
+        page = Post.objects.select_related("author", "group")[
+            :NUMBERS_OF_POSTS
+        ]
+        full, full_kb = _peak(lambda: list(page))
+        deferred, deferred_kb = _peak(lambda: list(page.defer("text")))
+        self.stdout.write(
+            f"Память на чтение страницы: было {full_kb} КБ, "
+            f"стало {deferred_kb} КБ"
+        )
+        for cache in caches.all():
+            cache.clear()
+        response = Client().get(reverse("posts:index"))
+        now = len(response.content)
+        before = (
+            now
+            - len(EXCERPT.render(Context({"posts": deferred})).encode())
+            + len(FULL_TEXT.render(Context({"posts": full})).encode())
+        )
+        self.stdout.write(
+            f"Ответ главной страницы: было {before / 1024:.1f} КБ, "
+            f"стало {now / 1024:.1f} КБ"
+        )
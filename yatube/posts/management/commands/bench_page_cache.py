@@ -0,0 +1,126 @@
+import random
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.cache import pages
+from posts.models import Comment, Group, Post, User
+
+GROUPS = 10
+POSTS_PER_AUTHOR = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест страниц без кеша страниц и с ним: "
+        "запросы в секунду и доля попаданий. Данные создаются во "
+        "временной транзакции и откатываются; все кеши очищаются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--writes",
+            type=float,
+            default=0.02,
+            help="Доля запросов, которые вместо чтения добавляют комментарий.",
+        )
+        parser.add_argument(
+            "--logged-in",
+            action="store_true",
+            help="Читать страницы вошедшим пользователем, а не гостем.",
+        )
+
+    def handle(self, *args, posts, requests, writes, logged_in, **options):
+        with transaction.atomic():
+            urls, post_ids, reader = self.populate(posts)
+            self.stdout.write(
+                f"{'кеш страниц':<12} {'запросов/с':>10} {'попаданий':>10}"
+            )
+            for label, timeout in (("выключен", 0), ("включён", 600)):
+                with override_settings(PAGE_CACHE_TIMEOUT=timeout):
+                    rate, ratio = self.run(
+                        urls, post_ids, reader, requests, writes, logged_in
+                    )
+                self.stdout.write(f"{label:<12} {rate:>10.1f} {ratio:>10.1%}")
+            transaction.set_rollback(True)
+        for cache in caches.all():
+            cache.clear()
+
+    def populate(self, posts):
+        reader = User.objects.create(username="bench_page_reader")
+        authors = max(1, posts // POSTS_PER_AUTHOR)
+        User.objects.bulk_create(
+            User(username=f"bench_page_author_{number}")
+            for number in range(authors)
+        )
+        Group.objects.bulk_create(
+            Group(title=f"bench {number}", slug=f"bench_page_{number}")
+            for number in range(GROUPS)
+        )
+        author_ids = list(
+            User.objects.filter(
+                username__startswith="bench_page_author_"
+            ).values_list("pk", flat=True)
+        )
+        groups = list(Group.objects.filter(slug__startswith="bench_page_"))
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author_id=author_ids[number % authors],
+                    group=groups[number % GROUPS],
+                    text=f"bench {number}",
+                )
+                for number in range(posts)
+            ),
+            batch_size=100,
+        )
+        post_ids = list(
+            Post.objects.filter(author_id__in=author_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        # Страницы от самых популярных к редким: лента, группы,
+        # профили, посты.
+        urls = [reverse("posts:index")]
+        urls += [
+            reverse("posts:group_list", args=[group.slug]) for group in groups
+        ]
+        urls += [
+            reverse("posts:profile", args=[f"bench_page_author_{number}"])
+            for number in range(authors)
+        ]
+        urls += [
+            reverse("posts:post_detail", args=[post_id])
+            for post_id in post_ids
+        ]
+        return urls, post_ids, reader
+
+    def run(self, urls, post_ids, reader, requests, writes, logged_in):
+        for cache in caches.all():
+            cache.clear()
+        generator = random.Random(0)
+        client = Client()
+        if logged_in:
+            client.force_login(reader)
+        started = time.perf_counter()
+        for _ in range(requests):
+            if generator.random() < writes:
+                Comment.objects.create(
+                    post_id=generator.choice(post_ids),
+                    author=reader,
+                    text="bench",
+                )
+                continue
+            # Популярность страниц убывает по степенному закону.
+            url = urls[int(len(urls) * generator.random() ** 3)]
+            client.get(url)
+        elapsed = time.perf_counter() - started
+        events = pages.stats()
+        lookups = events["hits"] + events["misses"]
+        return requests / elapsed, events["hits"] / lookups if lookups else 0
@@ -0,0 +1,104 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Post, User
+from posts.search import SearchPaginator
+from posts.views import NUMBERS_OF_POSTS
+
+VOCABULARY = 50000
+WORDS_PER_POST = 30
+
+
+def _word(generator):
+    # Частоты слов убывают примерно как в живом тексте: несколько слов
+    # встречаются почти везде, большинство -- редко.
+    return f"слово{int(VOCABULARY * generator.random() ** 3)}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск LIKE и FTS5 на сгенерированных постах. "
+        "Данные создаются во временной транзакции и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1000000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--query",
+            nargs="+",
+            default=["слово1", "слово300", "слово20000", "слово5 слово70"],
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.populate(options["posts"])
+            search.rebuild(10000)
+            self.stdout.write(
+                f"Подготовка: {time.perf_counter() - started:.1f} с"
+            )
+            self.stdout.write(
+                f"{'запрос':>20} {'LIKE, мс':>10} {'FTS5, мс':>10} "
+                f"{'FTS5 стр. 10, мс':>17}"
+            )
+            for query in options["query"]:
+                like_ms = self.measure(
+                    lambda: list(
+                        Post.objects.filter(text__icontains=query)[
+                            :NUMBERS_OF_POSTS
+                        ]
+                    ),
+                    options["repeat"],
+                )
+                fts_ms = self.measure(
+                    lambda: self.page(query, None), options["repeat"]
+                )
+                cursor = None
+                for _ in range(9):
+                    cursor = self.page(query, cursor).paginator.next_cursor
+                deep_ms = self.measure(
+                    lambda: self.page(query, cursor), options["repeat"]
+                )
+                self.stdout.write(
+                    f"{query:>20} {like_ms:>10.1f} {fts_ms:>10.1f} "
+                    f"{deep_ms:>17.1f}"
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, posts):
+        author = User.objects.create(username="bench_search_author")
+        generator = random.Random(0)
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author=author,
+                    text=" ".join(
+                        _word(generator) for _ in range(WORDS_PER_POST)
+                    ),
+                )
+                for _ in range(posts)
+            ),
+            batch_size=100,
+        )
+
+    @staticmethod
+    def page(query, cursor):
+        paginator = SearchPaginator(
+            search.search_posts(query), NUMBERS_OF_POSTS
+        )
+        return paginator.get_cursor_page(after=cursor)
+
+    @staticmethod
+    def measure(read, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            read()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.parsers import parse_geometry
+
+from core.uploads import HashingUploadHandler
+from posts import images
+
+CHUNK_SIZE = 64 * 1024
+EXIF_DESCRIPTION = 0x010E
+
+
+def _status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise CommandError("Нужен Linux с /proc/self/status.")
+
+
+def _receive(handler, path):
+    """Пропускает файл через обработчик загрузки, как при POST-запросе."""
+    name = os.path.basename(path)
+    size = os.path.getsize(path)
+    handler.new_file("image", name, "application/octet-stream", size)
+    start = 0
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            if handler.receive_data_chunk(chunk, start) is not None:
+                raise CommandError("Обработчик не принял данные.")
+            start += len(chunk)
+    return handler.file_complete(size)
+
+
+def _thumbnail(upload):
+    """Миниатюра post_card так же, как её строит sorl-thumbnail."""
+    geometry_string, preset_options = settings.THUMBNAIL_PRESETS["post_card"]
+    options = dict(default.backend.default_options, **preset_options)
+    upload.seek(0)
+    image = default.engine.get_image(upload)
+    ratio = default.engine.get_image_ratio(image, options)
+    geometry = parse_geometry(geometry_string, ratio)
+    return default.engine.create(image, geometry, options)
+
+
+def old_pipeline(path):
+    upload = _receive(TemporaryFileUploadHandler(), path)
+    yield
+    upload = forms.ImageField().clean(upload)
+    images.describe(upload)
+    _thumbnail(upload)
+
+
+def new_pipeline(path):
+    upload = _receive(HashingUploadHandler(), path)
+    yield
+    upload = forms.ImageField().clean(upload)
+    upload = images.prepare_upload(upload)
+    images.describe(upload)
+    _thumbnail(upload)
+
+
+def _measure(pipeline, path):
+    """Пиковый прирост RSS (КБ) и время обработки файла в дочернем процессе.
+
+    Пик сбрасывается записью «5» в /proc/self/clear_refs, так что память
+    родителя, унаследованная при fork, в замер не попадает.
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        steps = pipeline(path)
+        next(steps)
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        baseline = _status("VmRSS")
+        started = time.perf_counter()
+        try:
+            for _ in steps:
+                pass
+            outcome = "принят"
+        except (forms.ValidationError, images.ImageRejected) as error:
+            messages = getattr(error, "messages", [str(error)])
+            outcome = "отклонён: " + " ".join(messages)
+        result = {
+            "peak": _status("VmHWM") - baseline,
+            "seconds": time.perf_counter() - started,
+            "outcome": outcome,
+        }
+        with os.fdopen(write_end, "w") as pipe:
+            json.dump(result, pipe)
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        data = pipe.read()
+    os.waitpid(pid, 0)
+    if not data:
+        raise CommandError(f"Замер {path} завершился с ошибкой.")
+    return json.loads(data)
+
+
+def _gradient(size, noise=True):
+    # Шум делает JPEG похожим на фотографию по размеру файла; PNG с шумом
+    # не прошёл бы по FILE_UPLOAD_MAX_BYTES.
+    third = Image.effect_noise(size, 24) if noise else Image.new("L", size)
+    channels = [
+        Image.linear_gradient("L").resize(size),
+        Image.radial_gradient("L").resize(size),
+        third,
+    ]
+    return Image.merge("RGB", channels)
+
+
+def make_corpus(directory):
+    """Фотография 36 Мп, панорама 27 Мп, скан 24 Мп в PNG, JPEG с тяжёлым
+    EXIF и «бомба»: PNG 144 Мп, который весит меньше мегабайта."""
+    corpus = []
+
+    def add(name, image, **params):
+        path = os.path.join(directory, name)
+        image.save(path, **params)
+        corpus.append(path)
+
+    add("photo-36mp.jpg", _gradient((7360, 4912)), quality=85)
+    add("panorama-27mp.jpg", _gradient((9000, 3000)), quality=85)
+    add("scan-24mp.png", _gradient((6000, 4000), noise=False))
+    exif = Image.Exif()
+    exif[EXIF_DESCRIPTION] = "x" * 60000
+    add(
+        "exif-heavy.jpg",
+        _gradient((3000, 2000)),
+        quality=85,
+        exif=exif.tobytes(),
+    )
+    add("bomb-144mp.png", Image.new("L", (12000, 12000)))
+    return corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пиковую память при приёме картинки до и после "
+        "потоковой загрузки с проверками по заголовку и draft-декодированием: "
+        "проверка формы, сведения о картинке и миниатюра post_card. "
+        "Каждый файл обрабатывается в отдельном процессе (только Linux)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus",
+            nargs="+",
+            help="Свои файлы вместо сгенерированного набора.",
+        )
+
+    def handle(self, *args, corpus, **options):
+        directory = None
+        if not corpus:
+            directory = tempfile.mkdtemp()
+            self.stdout.write("Создаю набор картинок...")
+            corpus = make_corpus(directory)
+        try:
+            self.report(corpus)
+        finally:
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def report(self, corpus):
+        self.stdout.write(
+            f"{'файл':>16} {'МБ':>6} {'было, МБ':>9} {'стало, МБ':>10} "
+            f"{'было, с':>8} {'стало, с':>9}  результат"
+        )
+        for path in corpus:
+            old = _measure(old_pipeline, path)
+            new = _measure(new_pipeline, path)
+            self.stdout.write(
+                f"{os.path.basename(path)[:16]:>16} "
+                f"{os.path.getsize(path) / 2 ** 20:6.1f} "
+                f"{old['peak'] / 1024:9.1f} {new['peak'] / 1024:10.1f} "
+                f"{old['seconds']:8.2f} {new['seconds']:9.2f}  "
+                f"{new['outcome']}"
+            )
@@ -0,0 +1,287 @@
+import json
+import random
+import statistics
+import tempfile
+import time
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache.sqlite import temporary_caches
+from posts.models import Follow, Group, Post, User
+
+VIEWS = ("index", "group_posts", "profile", "post_detail", "follow_index")
+METRICS = ("p50", "p95", "p99", "queries", "bytes")
+CANDIDATES = 20
+# Рост среднего числа запросов меньше этого -- шум, а не регрессия.
+QUERIES_TOLERANCE = 0.5
+DATASET_PREFIX = "bench_views"
+
+
+def summarize(latencies, queries, sizes):
+    """Перцентили задержки в мс и средние запросы и байты на ответ."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "p50": statistics.median(latencies),
+        "p95": cuts[94],
+        "p99": cuts[98],
+        "queries": statistics.mean(queries),
+        "bytes": statistics.mean(sizes),
+    }
+
+
+def change(before, after):
+    """Изменение в процентах; для нулевого «до» -- 0 или бесконечность."""
+    if not before:
+        return 0.0 if not after else float("inf")
+    return (after - before) / before * 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет представления постов через тестовый клиент: p50, p95 "
+        "и p99 задержки, запросы к базе и байты на ответ. Набор данных "
+        "создаётся generate_dataset во временной транзакции и "
+        "откатывается. Результаты пишутся в JSON и сравниваются с "
+        "прошлыми (--compare)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Сколько замеряемых запросов к каждому представлению.",
+        )
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--view", action="append", choices=VIEWS)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--existing",
+            action="store_true",
+            help="Замерять на данных из базы, не создавая набор.",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Очищать кеши перед каждым запросом.",
+        )
+        parser.add_argument(
+            "--page-cache",
+            action="store_true",
+            help="Не выключать кеш целых страниц.",
+        )
+        parser.add_argument("--output", help="Куда записать результаты.")
+        parser.add_argument(
+            "--compare", help="Файл с прошлыми результатами для сравнения."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10,
+            help="На сколько процентов может вырасти p95 без регрессии.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests должен быть не меньше 2.")
+        self.options = options
+        views = options["view"] or VIEWS
+        # Замер очищает кеши, а с откатываемым набором ещё и наполняет их
+        # несуществующими постами: рабочие кеши в нём не участвуют.
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            CACHES=temporary_caches(directory)
+        ):
+            if options["existing"]:
+                results = self.run(views)
+            else:
+                with transaction.atomic():
+                    call_command(
+                        "generate_dataset",
+                        users=options["users"],
+                        posts=options["posts"],
+                        comments=options["comments"],
+                        seed=options["seed"],
+                        prefix=DATASET_PREFIX,
+                        stdout=StringIO(),
+                    )
+                    results = self.run(views)
+                    transaction.set_rollback(True)
+        self.report(results)
+        if options["output"]:
+            self.save(results, options["output"])
+        if options["compare"]:
+            self.compare(results, options["compare"], options["threshold"])
+
+    def run(self, views):
+        timeout = None if self.options["page_cache"] else 0
+        results = {}
+        for view in views:
+            urls, user = getattr(self, f"targets_{view}")()
+            if not urls:
+                raise CommandError(f"{view}: нет данных для замера.")
+            for cache in caches.all():
+                cache.clear()
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            settings = {}
+            if timeout is not None:
+                settings["PAGE_CACHE_TIMEOUT"] = timeout
+            with override_settings(**settings):
+                results[view] = self.measure(client, urls)
+        return results
+
+    def measure(self, client, urls):
+        generator = random.Random(self.options["seed"])
+        # Каждая страница прогревается хотя бы раз, иначе редкие промахи
+        # кешей случайно попадают в хвост задержек.
+        for url in urls:
+            client.get(url)
+        for _ in range(self.options["warmup"]):
+            client.get(generator.choice(urls))
+        latencies, queries, sizes = [], [], []
+        for _ in range(self.options["requests"]):
+            url = generator.choice(urls)
+            if self.options["cold"]:
+                for cache in caches.all():
+                    cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url}: ответ {response.status_code}")
+            queries.append(len(captured))
+            sizes.append(len(response.content))
+        return summarize(latencies, queries, sizes)
+
+    def targets_index(self):
+        return [reverse("posts:index")], None
+
+    def targets_group_posts(self):
+        groups = Group.objects.annotate(posts_count=Count("posts")).order_by(
+            "-posts_count"
+        )[:CANDIDATES]
+        return [
+            reverse("posts:group_list", args=[slug])
+            for slug in groups.values_list("slug", flat=True)
+        ], None
+
+    def targets_profile(self):
+        authors = (
+            Post.objects.values("author__username")
+            .annotate(posts_count=Count("pk"))
+            .order_by("-posts_count")[:CANDIDATES]
+        )
+        return [
+            reverse("posts:profile", args=[row["author__username"]])
+            for row in authors
+        ], None
+
+    def targets_post_detail(self):
+        bounds = Post.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            return [], None
+        generator = random.Random(self.options["seed"])
+        sample = [
+            generator.randint(bounds["first"], bounds["last"])
+            for _ in range(CANDIDATES * 5)
+        ]
+        post_ids = Post.objects.filter(pk__in=sample).values_list(
+            "pk", flat=True
+        )
+        return [
+            reverse("posts:post_detail", args=[pk]) for pk in post_ids
+        ], None
+
+    def targets_follow_index(self):
+        reader = (
+            Follow.objects.values("user_id")
+            .annotate(follows=Count("pk"))
+            .order_by("-follows")
+            .first()
+        )
+        if reader is None:
+            return [], None
+        user = User.objects.get(pk=reader["user_id"])
+        return [reverse("posts:follow_index")], user
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'представление':<14} {'p50 мс':>8} {'p95 мс':>8} "
+            f"{'p99 мс':>8} {'запросов':>9} {'КБ':>8}"
+        )
+        for view, result in results.items():
+            self.stdout.write(
+                f"{view:<14} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+                f"{result['p99']:>8.2f} {result['queries']:>9.1f} "
+                f"{result['bytes'] / 1024:>8.1f}"
+            )
+
+    def save(self, results, path):
+        options = {
+            name: self.options[name]
+            for name in (
+                "requests",
+                "warmup",
+                "users",
+                "posts",
+                "comments",
+                "seed",
+                "existing",
+                "cold",
+                "page_cache",
+            )
+        }
+        data = {
+            "created": timezone.now().isoformat(),
+            "options": options,
+            "views": results,
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Результаты записаны в {path}")
+
+    def compare(self, results, path, threshold):
+        """Изменения относительно прошлых результатов. Регрессия -- рост
+        p95 больше чем на threshold процентов или рост среднего числа
+        запросов больше QUERIES_TOLERANCE."""
+        try:
+            with open(path, encoding="utf-8") as file:
+                baseline = json.load(file)["views"]
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Не удалось прочитать {path}: {error}")
+        self.stdout.write(f"Изменения относительно {path}:")
+        regressions = []
+        for view, result in results.items():
+            if view not in baseline:
+                continue
+            before = baseline[view]
+            self.stdout.write(
+                f"{view:<14} "
+                + " ".join(
+                    f"{metric} {change(before[metric], result[metric]):+.1f}%"
+                    for metric in METRICS
+                )
+            )
+            if (
+                change(before["p95"], result["p95"]) > threshold
+                or result["queries"] - before["queries"] > QUERIES_TOLERANCE
+            ):
+                regressions.append(view)
+        if regressions:
+            raise CommandError(f"Регрессия: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("Регрессий нет."))
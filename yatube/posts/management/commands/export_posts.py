@@ -0,0 +1,82 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает посты, комментарии или подписки в JSONL или CSV "
+        "частями по порядку id, не загружая таблицу в память. С --since "
+        "выгружаются только строки, изменённые после этого времени."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", choices=export.DATASETS, default="posts"
+        )
+        parser.add_argument(
+            "--format", choices=export.FORMATS, default="jsonl"
+        )
+        parser.add_argument(
+            "--since",
+            help="Время в ISO 8601, например 2024-01-31T12:00:00+03:00.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export.CHUNK_SIZE,
+            help="Сколько строк выбирать одним запросом.",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Сжимать вывод в gzip."
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Файл для выгрузки; по умолчанию -- stdout.",
+        )
+
+    def handle(
+        self,
+        *args,
+        dataset,
+        format,
+        since,
+        chunk_size,
+        gzip,
+        output,
+        **options,
+    ):
+        if since is not None:
+            try:
+                since = export.parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+        chunks = export.encode(
+            export.lines(dataset, format, since, chunk_size), gzip
+        )
+        started = time.perf_counter()
+        if output == "-":
+            written = write(chunks, sys.stdout.buffer)
+        else:
+            with open(output, "wb") as file:
+                written = write(chunks, file)
+        elapsed = time.perf_counter() - started
+        # В stdout идут данные, поэтому итог пишется в stderr.
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Готово: выгружено {written} байт за {elapsed:.1f} с."
+            )
+        )
+
+
+def write(chunks, file):
+    written = 0
+    for chunk in chunks:
+        file.write(chunk)
+        written += len(chunk)
+    file.flush()
+    return written
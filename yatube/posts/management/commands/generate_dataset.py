@@ -0,0 +1,287 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from posts import bulk, search, timeline
+from posts.images import describe
+from posts.models import Comment, Counter, Follow, Group, Post, User
+
+WORDS = (
+    "кот собака утро вечер город река лес дорога дом окно книга письмо "
+    "друг работа отпуск море солнце дождь снег ветер чай кофе музыка "
+    "фильм поезд вокзал рынок парк мост сад поле небо звезда новость "
+    "идея проект код ошибка релиз тест сервер база запрос страница"
+).split()
+IMAGE_SIZE = (640, 480)
+GROUP_SHARE = 0.7
+SQLITE_CACHE_KIB = 256 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт воспроизводимый синтетический набор данных: "
+        "пользователей, группы, подписки со степенным распределением "
+        "популярности, посты и комментарии -- вставками bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--comments", type=int, default=100000)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=20,
+            help="Сколько авторов в среднем читает пользователь.",
+        )
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=0,
+            help="Сколько разных картинок-заглушек создать; "
+            "0 -- посты без картинок.",
+        )
+        parser.add_argument(
+            "--image-share",
+            type=float,
+            default=0.2,
+            help="Доля постов с картинкой.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="За сколько последних дней распределить даты постов.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="gen",
+            help="Начало имён пользователей и slug групп.",
+        )
+        parser.add_argument(
+            "--password",
+            help="Пароль всех пользователей; без него войти нельзя.",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.prefix = options["prefix"]
+        self.batch_size = options["batch_size"]
+        self.random = random.Random(options["seed"])
+        users = User.objects.filter(username__startswith=f"{self.prefix}_")
+        if users.exists():
+            raise CommandError(
+                f"Пользователи с именами на «{self.prefix}_» уже есть; "
+                "укажите другой --prefix."
+            )
+        if connection.vendor == "sqlite":
+            # Индексы лент подписок быстро перерастают кеш страниц SQLite
+            # по умолчанию (2 МБ), и вставка упирается в чтение с диска.
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KIB}")
+        started = time.perf_counter()
+        user_ids = self.step("пользователи", self.create_users)
+        group_ids = self.step("группы", self.create_groups)
+        self.step("подписки", self.create_follows, user_ids)
+        images = self.step("картинки", self.create_images)
+        post_ids = self.step(
+            "посты", self.create_posts, user_ids, group_ids, images
+        )
+        self.step("комментарии", self.create_comments, user_ids, post_ids)
+        search.optimize()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово за {time.perf_counter() - started:.1f} с."
+            )
+        )
+
+    def step(self, name, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.stdout.write(f"{name}: {time.perf_counter() - started:.1f} с")
+        return result
+
+    def popularity(self, ids):
+        """Накопленные веса закона Ципфа для ids в случайном порядке:
+        немногие популярны, большинство -- почти нет."""
+        ids = list(ids)
+        self.random.shuffle(ids)
+        weights = accumulate(1 / rank for rank in range(1, len(ids) + 1))
+        return ids, list(weights)
+
+    def batches(self, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def create_users(self):
+        password = make_password(self.options["password"])
+        for batch in self.batches(
+            User(username=f"{self.prefix}_{number}", password=password)
+            for number in range(self.options["users"])
+        ):
+            User.objects.bulk_create(batch)
+        return list(
+            User.objects.filter(username__startswith=f"{self.prefix}_")
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def create_groups(self):
+        Group.objects.bulk_create(
+            Group(
+                title=f"Группа {number}",
+                slug=f"{self.prefix}-{number}",
+                description=self.text(10, 30),
+            )
+            for number in range(self.options["groups"])
+        )
+        return list(
+            Group.objects.filter(slug__startswith=f"{self.prefix}-")
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def create_follows(self, user_ids):
+        """Число подписок пользователя -- по Парето со средним --follows,
+        авторы выбираются по закону Ципфа."""
+        authors, weights = self.popularity(user_ids)
+        average = self.options["follows"]
+
+        def follows():
+            for user_id in user_ids:
+                wanted = min(
+                    len(authors) - 1,
+                    int(average / 2 * self.random.paretovariate(2)),
+                )
+                chosen = set(
+                    self.random.choices(authors, cum_weights=weights, k=wanted)
+                )
+                chosen.discard(user_id)
+                for author_id in chosen:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        for batch in self.batches(follows()):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+        call_command(
+            "reconcile_counters",
+            kind=[Counter.FOLLOWERS, Counter.FOLLOWING],
+            stdout=StringIO(),
+        )
+        # Подписки вставлены мимо сигналов: без этого популярные авторы
+        # не перейдут на чтение при открытии ленты, и их посты разойдутся
+        # по всем лентам.
+        timeline.reconcile_pulled_authors()
+
+    def create_images(self):
+        """Картинки-заглушки: градиент со случайными цветами. Посты
+        ссылаются на одни и те же файлы."""
+        images = []
+        for number in range(self.options["images"]):
+            image = Image.new("RGB", IMAGE_SIZE)
+            draw = ImageDraw.Draw(image)
+            start, end = (
+                [self.random.randrange(256) for _ in range(3)]
+                for _ in range(2)
+            )
+            for y in range(IMAGE_SIZE[1]):
+                share = y / IMAGE_SIZE[1]
+                color = tuple(
+                    int(a + (b - a) * share) for a, b in zip(start, end)
+                )
+                draw.line([(0, y), (IMAGE_SIZE[0], y)], fill=color)
+            buffer = BytesIO()
+            image.save(buffer, "JPEG", quality=85)
+            name = default_storage.save(
+                f"posts/{self.prefix}_{number}.jpg",
+                ContentFile(buffer.getvalue()),
+            )
+            buffer.seek(0)
+            images.append({"image": name, **describe(buffer)})
+        return images
+
+    def text(self, shortest, longest):
+        words = self.random.choices(
+            WORDS, k=self.random.randint(shortest, longest)
+        )
+        return " ".join(words).capitalize() + "."
+
+    def create_posts(self, user_ids, group_ids, images):
+        authors, weights = self.popularity(user_ids)
+        now = timezone.now()
+        seconds = self.options["days"] * 24 * 60 * 60
+        image_share = self.options["image_share"]
+
+        def posts():
+            for _ in range(self.options["posts"]):
+                pub_date = now - timedelta(
+                    seconds=self.random.randrange(seconds)
+                )
+                post = Post(
+                    author_id=self.random.choices(
+                        authors, cum_weights=weights
+                    )[0],
+                    group_id=(
+                        self.random.choice(group_ids)
+                        if group_ids and self.random.random() < GROUP_SHARE
+                        else None
+                    ),
+                    text=self.text(5, 120),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                )
+                if images and self.random.random() < image_share:
+                    for field, value in self.random.choice(images).items():
+                        setattr(post, field, value)
+                yield post
+
+        post_ids = []
+        for batch in self.batches(posts()):
+            post_ids.extend(self.insert_posts(batch))
+            self.stdout.write(f"Создано постов: {len(post_ids)}")
+        return post_ids
+
+    @transaction.atomic
+    def insert_posts(self, posts):
+        with bulk.explicit_dates():
+            post_ids = bulk.create_posts(posts)
+        author_ids, group_ids = bulk.after_insert(post_ids)
+        bulk.purge_pages(author_ids, group_ids)
+        return post_ids
+
+    def create_comments(self, user_ids, post_ids):
+        if not post_ids:
+            return
+        for batch in self.batches(
+            Comment(
+                post_id=self.random.choice(post_ids),
+                author_id=self.random.choice(user_ids),
+                text=self.text(3, 40),
+            )
+            for _ in range(self.options["comments"])
+        ):
+            Comment.objects.bulk_create(batch)
+        call_command(
+            "reconcile_counters",
+            kind=[Counter.POST_COMMENTS],
+            stdout=StringIO(),
+        )
@@ -0,0 +1,59 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core import thumbnails
+from posts.images import UNREADABLE, record_variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт варианты IMAGE_VARIANTS для картинок постов, у которых "
+        "их ещё нет, на пуле процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Число процессов; 0 -- создавать в текущем процессе.",
+        )
+
+    def handle(self, *args, workers, **options):
+        names = list(
+            Post.objects.exclude(image="")
+            .filter(image_variants="")
+            .order_by()
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        self.stdout.write(f"Картинок без вариантов: {len(names)}.")
+        if workers:
+            with thumbnails.make_pool(workers) as pool:
+                failed = self.run(pool.map(_safe, names, chunksize=8))
+        else:
+            failed = self.run(map(_safe, names))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: обработано {len(names) - failed}, "
+                f"пропущено (нет файла или не картинка) {failed}."
+            )
+        )
+
+    def run(self, results):
+        failed = 0
+        for done, ok in enumerate(results, 1):
+            failed += not ok
+            if done % 100 == 0:
+                self.stdout.write(f"Обработано: {done}")
+        return failed
+
+
+def _safe(name):
+    try:
+        record_variants(name)
+    except UNREADABLE:
+        return False
+    return True
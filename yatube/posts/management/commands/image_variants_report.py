@@ -0,0 +1,116 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core import thumbnails, variants
+from posts.models import Post
+
+CHUNK_SIZE = 500
+BEFORE = "было"
+
+
+def _size(name):
+    try:
+        return default_storage.size(name)
+    except OSError:
+        return 0
+
+
+def _pick(pairs, width):
+    """Ширина, которую браузер выберет из srcset для слота width пикселей:
+    самый узкий вариант не уже слота, иначе самый широкий."""
+    for pair in pairs:
+        if pair[0] >= width:
+            return pair[0]
+    return pairs[-1][0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Считает, сколько байт экономят варианты картинок по сравнению с "
+        "тем, что отдавалось раньше: миниатюрой post_card или исходником."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--slot",
+            type=int,
+            nargs="+",
+            default=[780, 1440],
+            help=(
+                "Ширины слота картинки в физических пикселях; по умолчанию "
+                "телефон (390 точек, DPR 2) и ноутбук."
+            ),
+        )
+
+    def handle(self, *args, slot, **options):
+        posts = (
+            Post.objects.exclude(image="")
+            .exclude(image_variants="")
+            .order_by("pk")
+            .only("pk", "image", "image_size", "image_variants")
+        )
+        totals = Counter()
+        seen = set()
+        last_pk = 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            chunk = [post for post in chunk if post.image.name not in seen]
+            seen.update(post.image.name for post in chunk)
+            ready = thumbnails.ready_thumbnails(
+                [post.image for post in chunk], "post_card"
+            )
+            for post in chunk:
+                served = ready.get(post.image.name)
+                self.measure(post, served, slot, totals)
+        self.report(len(seen), slot, totals)
+
+    def measure(self, post, served, slot, totals):
+        name = post.image.name
+        original = post.image_size or _size(name)
+        totals["originals"] += original
+        # Раньше и лента, и страница поста показывали миниатюру post_card,
+        # а пока её не создали -- исходник.
+        served_size = _size(served.name) if served else original
+        for variant_set, by_format in json.loads(post.image_variants).items():
+            for image_format, pairs in by_format.items():
+                for width, _ in pairs:
+                    totals["stored"] += _size(
+                        variants.variant_name(
+                            name, variant_set, width, image_format
+                        )
+                    )
+                for width in slot:
+                    chosen = variants.variant_name(
+                        name, variant_set, _pick(pairs, width), image_format
+                    )
+                    totals[variant_set, width, image_format] += _size(chosen)
+            for width in slot:
+                totals[variant_set, width, BEFORE] += served_size
+
+    def report(self, count, slot, totals):
+        mb = 2 ** 20
+        self.stdout.write(
+            f"Картинок с вариантами: {count}; исходники "
+            f"{totals['originals'] / mb:.1f} МБ, варианты "
+            f"{totals['stored'] / mb:.1f} МБ."
+        )
+        for variant_set in settings.IMAGE_VARIANTS:
+            self.stdout.write(f"{variant_set}, все картинки по одному разу:")
+            for width in slot:
+                before = totals[variant_set, width, BEFORE]
+                line = f"  слот {width:>5} px: {BEFORE} {before / mb:.1f} МБ"
+                for image_format in variants.formats():
+                    size = totals[variant_set, width, image_format]
+                    saved = 1 - size / before if before else 0
+                    line += (
+                        f", {image_format} {size / mb:.1f} МБ "
+                        f"(экономия {saved:.0%})"
+                    )
+                self.stdout.write(line)
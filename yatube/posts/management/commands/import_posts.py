@@ -0,0 +1,193 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import bulk, search
+from posts.models import Group, Post, User
+
+FORMATS = ("jsonl", "csv")
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует посты из JSONL или CSV (файл или «-» для stdin) "
+        "с полями text, author, group и pub_date. Посты вставляются "
+        "пачками через bulk_create, а индекс поиска, счётчики и ленты "
+        "подписчиков обновляются одним проходом на пачку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с постами или «-» для stdin.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Формат данных; по умолчанию -- по расширению файла.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько постов вставлять в одной транзакции.",
+        )
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Создавать неизвестных авторов и группы, а не пропускать "
+            "их посты.",
+        )
+
+    def handle(
+        self, *args, path, format, batch_size, create_missing, **options
+    ):
+        if batch_size < 1:
+            raise CommandError("--batch-size должен быть положительным.")
+        format = format or ("csv" if path.endswith(".csv") else "jsonl")
+        self.create_missing = create_missing
+        self.authors = {}
+        self.groups = {}
+        self.skipped = 0
+        imported = 0
+        started = time.perf_counter()
+        if path == "-":
+            imported = self.import_rows(sys.stdin, format, batch_size)
+        else:
+            try:
+                with open(path, encoding="utf-8", newline="") as file:
+                    imported = self.import_rows(file, format, batch_size)
+            except OSError as error:
+                raise CommandError(f"Не удалось открыть {path}: {error}")
+        search.optimize()
+        rate = imported / (time.perf_counter() - started)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: импортировано {imported}, пропущено "
+                f"{self.skipped}, {rate:.0f} постов в секунду."
+            )
+        )
+
+    def import_rows(self, file, format, batch_size):
+        rows = self.read(file, format)
+        imported = 0
+        started = time.perf_counter()
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return imported
+            imported += self.import_batch(batch)
+            rate = imported / (time.perf_counter() - started)
+            self.stdout.write(
+                f"Импортировано постов: {imported} ({rate:.0f} в секунду)"
+            )
+
+    def read(self, file, format):
+        """Строки файла по одной: номер строки и поля."""
+        if format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                self.skip(number, f"не JSON: {error}")
+                continue
+            if not isinstance(row, dict):
+                self.skip(number, "ожидался объект JSON")
+                continue
+            yield number, row
+
+    def skip(self, number, reason):
+        self.skipped += 1
+        self.stderr.write(f"Строка {number} пропущена: {reason}")
+
+    def parse(self, row):
+        """Поля поста из строки файла; ValueError, если строка неверна."""
+        text = row.get("text") or ""
+        author = row.get("author") or ""
+        if not text.strip() or not author:
+            raise ValueError("нужны text и author")
+        pub_date = timezone.now()
+        if row.get("pub_date"):
+            pub_date = parse_datetime(row["pub_date"])
+            if pub_date is None:
+                raise ValueError(f"неверная дата {row['pub_date']!r}")
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return text, author, row.get("group") or None, pub_date
+
+    def import_batch(self, batch):
+        parsed = []
+        for number, row in batch:
+            try:
+                parsed.append((number, *self.parse(row)))
+            except (AttributeError, TypeError, ValueError) as error:
+                self.skip(number, error)
+        with transaction.atomic():
+            self.resolve_authors({row[2] for row in parsed})
+            self.resolve_groups({row[3] for row in parsed} - {None})
+            posts = []
+            for number, text, author, group, pub_date in parsed:
+                if author not in self.authors:
+                    self.skip(number, f"нет автора {author!r}")
+                    continue
+                if group is not None and group not in self.groups:
+                    self.skip(number, f"нет группы {group!r}")
+                    continue
+                posts.append(
+                    Post(
+                        text=text,
+                        author_id=self.authors[author],
+                        group_id=self.groups.get(group),
+                        pub_date=pub_date,
+                        updated=pub_date,
+                    )
+                )
+            if not posts:
+                return 0
+            with bulk.explicit_dates():
+                post_ids = bulk.create_posts(posts)
+            author_ids, group_ids = bulk.after_insert(post_ids)
+            bulk.purge_pages(author_ids, group_ids)
+        return len(posts)
+
+    def resolve_authors(self, usernames):
+        missing = usernames - self.authors.keys()
+        if missing and self.create_missing:
+            User.objects.bulk_create(
+                (
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                ),
+                ignore_conflicts=True,
+            )
+        if missing:
+            self.authors.update(
+                User.objects.filter(username__in=missing).values_list(
+                    "username", "pk"
+                )
+            )
+
+    def resolve_groups(self, slugs):
+        missing = slugs - self.groups.keys()
+        if missing and self.create_missing:
+            Group.objects.bulk_create(
+                (Group(title=slug, slug=slug) for slug in missing),
+                ignore_conflicts=True,
+            )
+        if missing:
+            self.groups.update(
+                Group.objects.filter(slug__in=missing).values_list(
+                    "slug", "pk"
+                )
+            )
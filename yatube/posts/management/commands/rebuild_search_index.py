@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Пересобирает полнотекстовый индекс постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Сколько постов индексировать одним запросом.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = search.rebuild(options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Готово: проиндексировано постов: {indexed}.")
+        )
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Follow, Post, TimelineEntry
+from posts.timeline import (
+    bulk_insert,
+    pulled_author_ids,
+    reconcile_pulled_authors,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает режим лент авторов (push или pull) по подпискам и "
+        "пересобирает ленты подписок пачками пользователей."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько подписчиков пересобирать в одной транзакции.",
+        )
+        parser.add_argument(
+            "--user", help="Пересобрать ленту только этого пользователя."
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        switched = reconcile_pulled_authors()
+        self.stdout.write(f"Авторов, сменивших режим ленты: {switched}")
+        follows = Follow.objects.all()
+        if options["user"]:
+            follows = follows.filter(user__username=options["user"])
+        user_ids = list(
+            follows.order_by("user_id")
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+        entries = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            entries += self.rebuild_chunk(chunk)
+            self.stdout.write(
+                f"Пересобрано лент: {start + len(chunk)}/{len(user_ids)}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: {len(user_ids)} лент, {entries} записей."
+            )
+        )
+
+    @transaction.atomic
+    def rebuild_chunk(self, user_ids):
+        TimelineEntry.objects.filter(user_id__in=user_ids).delete()
+        rows = (
+            Post.objects.filter(author__following__user_id__in=user_ids)
+            .exclude(author_id__in=pulled_author_ids())
+            .values_list(
+                "author__following__user_id", "pk", "author_id", "pub_date"
+            )
+        )
+        return bulk_insert(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id, post_id, author_id, pub_date in rows.iterator()
+        )
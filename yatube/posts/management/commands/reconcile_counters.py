@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from posts.counters import SOURCES, source
+from posts.models import Counter
+
+
+class Command(BaseCommand):
+    help = "Сверяет счётчики с базой пачками и исправляет расхождения."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Сколько объектов сверять в одной транзакции.",
+        )
+        parser.add_argument(
+            "--kind",
+            action="append",
+            choices=list(SOURCES),
+            help="Сверять только этот счётчик (можно несколько раз).",
+        )
+
+    def handle(self, *args, **options):
+        for kind in options["kind"] or SOURCES:
+            fixed = self.reconcile(kind, options["chunk_size"])
+            self.stdout.write(f"{kind}: исправлено {fixed}")
+        self.stdout.write(self.style.SUCCESS("Счётчики сверены."))
+
+    def reconcile(self, kind, chunk_size):
+        field = SOURCES[kind][1]
+        if field is None:
+            return self.reconcile_chunk(kind, {0: source(kind).count()}, 0, 1)
+        rows = source(kind).exclude(**{field: None})
+        counters = Counter.objects.filter(kind=kind)
+        top = max(
+            rows.aggregate(top=Max(field))["top"] or 0,
+            counters.aggregate(top=Max("object_id"))["top"] or 0,
+        )
+        fixed = 0
+        for start in range(0, top + 1, chunk_size):
+            end = start + chunk_size
+            actual = dict(
+                rows.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+                .values(field)
+                .annotate(value=Count("pk"))
+                .values_list(field, "value")
+            )
+            fixed += self.reconcile_chunk(kind, actual, start, end)
+        return fixed
+
+    @transaction.atomic
+    def reconcile_chunk(self, kind, actual, start, end):
+        stored = {
+            counter.object_id: counter
+            for counter in Counter.objects.filter(
+                kind=kind, object_id__gte=start, object_id__lt=end
+            )
+        }
+        changed = []
+        for object_id, counter in stored.items():
+            value = actual.get(object_id, 0)
+            if counter.value != value:
+                counter.value = value
+                changed.append(counter)
+        Counter.objects.bulk_update(changed, ["value"])
+        missing = [
+            Counter(kind=kind, object_id=object_id, value=value)
+            for object_id, value in actual.items()
+            if object_id not in stored
+        ]
+        Counter.objects.bulk_create(missing, ignore_conflicts=True)
+        return len(changed) + len(missing)
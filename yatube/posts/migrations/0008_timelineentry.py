@@ -0,0 +1,94 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0007_post_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "pub_date",
+                    models.DateTimeField(verbose_name="Дата публикации"),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор записи",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="posts.Post",
+                        verbose_name="Пост",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Подписчик",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись ленты",
+                "verbose_name_plural": "Ленты подписок",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_pub_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["user", "author"], name="timeline_user_author_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="timelineentry",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="timeline_unique_post"
+            ),
+        ),
+        migrations.RunSQL(
+            sql=(
+                "INSERT INTO posts_timelineentry "
+                "(user_id, post_id, author_id, pub_date) "
+                "SELECT f.user_id, p.id, p.author_id, p.pub_date "
+                "FROM posts_follow f "
+                "JOIN posts_post p ON p.author_id = f.author_id"
+            ),
+            reverse_sql="DELETE FROM posts_timelineentry",
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+SEED_COUNTERS = [
+    "SELECT 'posts', 0, COUNT(*) FROM posts_post",
+    "SELECT 'author_posts', author_id, COUNT(*) FROM posts_post "
+    "GROUP BY author_id",
+    "SELECT 'group_posts', group_id, COUNT(*) FROM posts_post "
+    "WHERE group_id IS NOT NULL GROUP BY group_id",
+    "SELECT 'post_comments', post_id, COUNT(*) FROM posts_comment "
+    "WHERE post_id IS NOT NULL GROUP BY post_id",
+    "SELECT 'followers', author_id, COUNT(*) FROM posts_follow "
+    "GROUP BY author_id",
+    "SELECT 'following', user_id, COUNT(*) FROM posts_follow "
+    "GROUP BY user_id",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_timelineentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Counter",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("posts", "Все посты"),
+                            ("author_posts", "Посты автора"),
+                            ("group_posts", "Посты группы"),
+                            ("post_comments", "Комментарии к посту"),
+                            ("followers", "Подписчики автора"),
+                            ("following", "Подписки пользователя"),
+                        ],
+                        max_length=32,
+                        verbose_name="Счётчик",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.BigIntegerField(default=0, verbose_name="Объект"),
+                ),
+                (
+                    "value",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Значение"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Счётчик",
+                "verbose_name_plural": "Счётчики",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="counter",
+            index=models.Index(
+                fields=["kind", "value"], name="counter_value_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="counter",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "object_id"), name="counter_unique_object"
+            ),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "INSERT INTO posts_counter (kind, object_id, value) " + query
+                for query in SEED_COUNTERS
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0011_post_image_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="image_variants",
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                verbose_name="Варианты картинки разной ширины",
+            ),
+        ),
+    ]
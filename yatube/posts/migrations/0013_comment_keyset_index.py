@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0012_post_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "-pub_date", "-id"],
+                name="comment_post_pub_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 2.2.16 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+EXCERPT_LENGTH = 500
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    # Копия posts.models.make_excerpt на момент миграции: миграция не
+    # должна меняться вместе с моделями.
+    if len(text) <= length:
+        return text, False
+    excerpt = text[:length]
+    space = excerpt.rfind(" ")
+    if space > length * 0.8:
+        excerpt = excerpt[:space]
+    return excerpt.rstrip(), True
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    posts = Post.objects.order_by("pk").only("pk", "text")
+    last_pk = 0
+    while True:
+        chunk = list(posts.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for post in chunk:
+            post.excerpt, post.has_more = make_excerpt(post.text)
+        Post.objects.bulk_update(chunk, ["excerpt", "has_more"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0013_comment_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="Начало текста"
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="has_more",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                verbose_name="Текст длиннее начала",
+            ),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
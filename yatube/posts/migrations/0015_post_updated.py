@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 22:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0014_post_excerpt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="updated",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            "UPDATE posts_post SET updated = pub_date",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0015_post_updated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="follow",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата подписки",
+            ),
+            preserve_default=False,
+        ),
+    ]
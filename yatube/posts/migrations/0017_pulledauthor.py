@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0016_follow_created"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PulledAuthor",
+            fields=[
+                (
+                    "author",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Автор, читаемый при открытии ленты",
+                "verbose_name_plural": "Авторы, читаемые при открытии ленты",
+            },
+        ),
+    ]
@@ -5,6 +5,22 @@ User = get_user_model()
 
 
 NUMBER_OF_CHARACTERS = 15
+EXCERPT_LENGTH = 500
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Начало текста для лент и признак того, что текст длиннее.
+
+    Длинный текст обрезается по последнему пробелу, если он не слишком
+    далеко от границы, иначе -- ровно по length символов.
+    """
+    if len(text) <= length:
+        return text, False
+    excerpt = text[:length]
+    space = excerpt.rfind(" ")
+    if space > length * 0.8:
+        excerpt = excerpt[:space]
+    return excerpt.rstrip(), True
 
 
 class Group(models.Model):
@@ -20,11 +36,25 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не вызывает save(): начало текста заполняем здесь.
+        objs = list(objs)
+        for post in objs:
+            post.excerpt, post.has_more = make_excerpt(post.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Post(models.Model):
     text = models.TextField("Текст", help_text="Текст нового поста")
+    excerpt = models.TextField("Начало текста", blank=True, editable=False)
+    has_more = models.BooleanField(
+        "Текст длиннее начала", default=False, editable=False
+    )
     pub_date = models.DateTimeField(
         "Дата публикации", auto_now_add=True, db_index=True
     )
+    updated = models.DateTimeField("Дата изменения", auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -41,14 +71,64 @@ class Post(models.Model):
         help_text="Группа, к которой будет относиться пост",
     )
     image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    image_width = models.PositiveIntegerField(
+        "Ширина картинки", null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        "Высота картинки", null=True, blank=True, editable=False
+    )
+    image_size = models.PositiveIntegerField(
+        "Размер картинки в байтах", null=True, blank=True, editable=False
+    )
+    image_hash = models.CharField(
+        "SHA-256 картинки",
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+    image_placeholder = models.TextField(
+        "Размытое превью картинки", blank=True, editable=False
+    )
+    image_variants = models.TextField(
+        "Варианты картинки разной ширины", blank=True, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+        ]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
 
     def __str__(self):
-        return self.text[:NUMBER_OF_CHARACTERS]
+        return (self.excerpt or self.text)[:NUMBER_OF_CHARACTERS]
+
+    def save(self, *args, **kwargs):
+        # Если текст не загружен (defer), он и не менялся.
+        if "text" not in self.get_deferred_fields():
+            self.excerpt, self.has_more = make_excerpt(self.text)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "text" in update_fields:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "excerpt",
+                    "has_more",
+                }
+        super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -72,6 +152,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=["post", "-pub_date", "-id"],
+                name="comment_post_pub_date_idx",
+            ),
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
@@ -92,6 +178,7 @@ class Follow(models.Model):
         related_name="following",
         verbose_name="Автор записи",
     )
+    created = models.DateTimeField("Дата подписки", auto_now_add=True)
 
     class Meta:
         constraints = [
@@ -105,3 +192,96 @@ class Follow(models.Model):
         ]
         verbose_name = "Подписчик"
         verbose_name_plural = "Подписчики"
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Подписчик",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Пост",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор записи",
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="timeline_unique_post"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_pub_date_idx",
+            ),
+            models.Index(
+                fields=["user", "author"], name="timeline_user_author_idx"
+            ),
+        ]
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Ленты подписок"
+
+
+class PulledAuthor(models.Model):
+    """Автор, чьи посты не раскладываются по лентам подписчиков, а
+    читаются при открытии ленты."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+        verbose_name="Автор",
+    )
+
+    class Meta:
+        verbose_name = "Автор, читаемый при открытии ленты"
+        verbose_name_plural = "Авторы, читаемые при открытии ленты"
+
+
+class Counter(models.Model):
+    POSTS = "posts"
+    AUTHOR_POSTS = "author_posts"
+    GROUP_POSTS = "group_posts"
+    POST_COMMENTS = "post_comments"
+    FOLLOWERS = "followers"
+    FOLLOWING = "following"
+    KINDS = (
+        (POSTS, "Все посты"),
+        (AUTHOR_POSTS, "Посты автора"),
+        (GROUP_POSTS, "Посты группы"),
+        (POST_COMMENTS, "Комментарии к посту"),
+        (FOLLOWERS, "Подписчики автора"),
+        (FOLLOWING, "Подписки пользователя"),
+    )
+
+    kind = models.CharField("Счётчик", max_length=32, choices=KINDS)
+    object_id = models.BigIntegerField("Объект", default=0)
+    value = models.BigIntegerField("Значение", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="counter_unique_object"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "value"], name="counter_value_idx"),
+        ]
+        verbose_name = "Счётчик"
+        verbose_name_plural = "Счётчики"
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}={self.value}"
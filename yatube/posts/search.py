@@ -0,0 +1,166 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core.paginator import (
+    CursorPaginator,
+    InvalidCursor,
+    cursor_key,
+    pack_cursor,
+    unpack_cursor,
+)
+from .models import Post
+
+FTS_TABLE = "posts_post_fts"
+SNIPPET_TOKENS = 16
+# Границы совпадений в сниппете: управляющие символы не встречаются
+# в тексте постов, поэтому текст можно экранировать целиком, а границы
+# заменить на <mark> уже после.
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+WORD = re.compile(r"\w+")
+
+
+def to_match(query):
+    """Запрос FTS5 из пользовательской строки: все слова обязательны.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в строке
+    поиска не ломали запрос. Если слов нет, возвращает None.
+    """
+    words = WORD.findall(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)",
+            [post.pk, post.text],
+        )
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+
+def index_range(first, last):
+    """Индексирует посты с id от first до last одним запросом; строки
+    этих постов должны отсутствовать в индексе (например, после
+    bulk_create). Возвращает число проиндексированных постов."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, text) "
+            "SELECT id, text FROM posts_post WHERE id BETWEEN %s AND %s",
+            [first, last],
+        )
+        return cursor.rowcount
+
+
+def index_posts(post_ids):
+    """Индексирует посты post_ids одним запросом; их строк не должно быть
+    в индексе (например, после bulk_create). Возвращает число
+    проиндексированных постов."""
+    placeholders = ", ".join(["%s"] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, text) "
+            f"SELECT id, text FROM posts_post WHERE id IN ({placeholders})",
+            list(post_ids),
+        )
+        return cursor.rowcount
+
+
+def optimize():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+
+
+def rebuild(chunk_size):
+    """Заново заполняет индекс диапазонами id по chunk_size постов."""
+    indexed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute("SELECT MIN(id), MAX(id) FROM posts_post")
+        first, last = cursor.fetchone()
+    if first is None:
+        return indexed
+    for start in range(first, last + 1, chunk_size):
+        indexed += index_range(start, start + chunk_size - 1)
+    optimize()
+    return indexed
+
+
+def matching_ids(match):
+    """Подзапрос с id постов, подходящих под запрос FTS5."""
+    return RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+    )
+
+
+def search_posts(query):
+    """Посты, подходящие под запрос, с релевантностью score и сниппетом.
+
+    score -- bm25 со знаком минус: чем больше, тем релевантнее.
+    """
+    match = to_match(query)
+    if match is None:
+        return Post.objects.none()
+    return (
+        Post.objects.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f"{FTS_TABLE}.rowid = posts_post.id",
+                f"{FTS_TABLE} MATCH %s",
+            ],
+            params=[match],
+        )
+        .annotate(
+            score=RawSQL(f"-{FTS_TABLE}.rank", ()),
+            snippet=RawSQL(
+                f"snippet({FTS_TABLE}, 0, %s, %s, %s, %s)",
+                (MATCH_START, MATCH_END, "…", SNIPPET_TOKENS),
+            ),
+        )
+        .select_related("author", "group")
+        .defer("text")
+    )
+
+
+def highlight(snippet):
+    """Экранированный сниппет, в котором совпадения выделены <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, "<mark>")
+        .replace(MATCH_END, "</mark>")
+    )
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная пагинация результатов поиска по (score, id)."""
+
+    date_field = "score"
+
+    def _position(self, token):
+        try:
+            score, pk = unpack_cursor(token)
+            return float(score), cursor_key(pk)
+        except (TypeError, ValueError):
+            raise InvalidCursor(token)
+
+    def _fetch(self, position, forward):
+        posts = super()._fetch(position, forward)
+        for post in posts:
+            post.snippet = highlight(post.snippet)
+        return posts
+
+    def _cursor(self, post):
+        return pack_cursor(post.score, post.pk)
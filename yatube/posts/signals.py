@@ -0,0 +1,142 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import pages
+
+from . import caching, counters, images, search, timeline
+from .models import Comment, Counter, Follow, Group, Post, User
+
+
+@receiver(pre_save, sender=Post)
+def record_image(sender, instance, **kwargs):
+    images.record_upload(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._saved_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("group_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    caching.bump_posts_version()
+    search.index_post(instance)
+    if created:
+        caching.purge_post_pages(instance, [instance.group_id], listed=True)
+        counters.count_post(instance, 1)
+        timeline.fan_out_post(instance)
+        return
+    saved_group_id = instance.__dict__.pop("_saved_group_id", None)
+    if saved_group_id != instance.group_id:
+        caching.purge_post_pages(
+            instance, [saved_group_id, instance.group_id]
+        )
+        counters.change(Counter.GROUP_POSTS, saved_group_id, -1)
+        counters.change(Counter.GROUP_POSTS, instance.group_id, 1)
+    else:
+        caching.purge_post_pages(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    caching.bump_posts_version()
+    caching.purge_post_pages(instance, [instance.group_id], listed=True)
+    search.unindex_post(instance.pk)
+    counters.count_post(instance, -1)
+    counters.forget([Counter.POST_COMMENTS], instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    caching.bump_comments_version(instance.post_id)
+    pages.purge(caching.COMMENTS_PAGES.format(pk=instance.post_id))
+    if created:
+        counters.change(Counter.POST_COMMENTS, instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    caching.bump_comments_version(instance.post_id)
+    pages.purge(caching.COMMENTS_PAGES.format(pk=instance.post_id))
+    counters.change(Counter.POST_COMMENTS, instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.count_follow(instance, 1)
+        timeline.refresh_pulled_authors(instance.author_id)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.count_follow(instance, -1)
+    timeline.refresh_pulled_authors(instance.author_id)
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    saved = Group.objects.filter(pk=instance.pk).only("slug").first()
+    if saved is not None:
+        caching.forget_group(saved)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    caching.forget_group(instance)
+    pages.purge(caching.GROUP_PAGES.format(pk=instance.pk))
+    # Название и slug группы выводятся в списках постов.
+    if not created:
+        caching.bump_posts_version()
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    caching.forget_group(instance)
+    pages.purge(caching.GROUP_PAGES.format(pk=instance.pk))
+    caching.bump_posts_version()
+    counters.forget([Counter.GROUP_POSTS], instance.pk)
+
+
+def _only_login(update_fields):
+    return update_fields is not None and set(update_fields) == {"last_login"}
+
+
+@receiver(pre_save, sender=User)
+def user_changing(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or _only_login(update_fields):
+        return
+    saved = User.objects.filter(pk=instance.pk).only("username").first()
+    if saved is not None:
+        caching.forget_author(saved)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if _only_login(update_fields):
+        return
+    caching.forget_author(instance)
+    pages.purge(caching.AUTHOR_PAGES.format(pk=instance.pk))
+    # Имя автора выводится в списках постов; у нового автора постов нет.
+    if not created:
+        caching.bump_posts_version()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    caching.forget_author(instance)
+    pages.purge(caching.AUTHOR_PAGES.format(pk=instance.pk))
+    caching.bump_posts_version()
+    counters.forget(
+        [Counter.AUTHOR_POSTS, Counter.FOLLOWERS, Counter.FOLLOWING],
+        instance.pk,
+    )
@@ -0,0 +1,17 @@
+from django import template
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, show_group=False):
+    """Список HTML карточек постов страницы, собранный из кеша.
+
+    На странице профиля (в контексте есть author) строка с автором
+    в карточках не выводится.
+    """
+    return render_cards(
+        posts, show_group=show_group, author=context.get("author")
+    )
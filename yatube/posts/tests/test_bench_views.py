@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.management.commands.bench_views import VIEWS
+
+
+class BenchViewsTests(TestCase):
+    def bench(self, *args):
+        call_command(
+            "bench_views",
+            "--users=20",
+            "--posts=60",
+            "--comments=20",
+            "--requests=3",
+            "--warmup=0",
+            # Задержки на трёх запросах -- шум: сравниваются только запросы.
+            "--threshold=1e9",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_results_saved_and_compared(self):
+        """Результаты всех представлений пишутся в JSON; рост числа
+        запросов относительно базовой линии -- регрессия."""
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as file:
+            path = file.name
+        self.addCleanup(os.remove, path)
+        self.bench(f"--output={path}")
+        with open(path, encoding="utf-8") as file:
+            results = json.load(file)
+        self.assertEqual(set(results["views"]), set(VIEWS))
+        for result in results["views"].values():
+            self.assertLessEqual(result["p50"], result["p99"])
+            self.assertGreater(result["bytes"], 0)
+        self.bench("--view=post_detail", f"--compare={path}")
+        results["views"]["post_detail"]["queries"] = 0
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(results, file)
+        with self.assertRaisesMessage(CommandError, "post_detail"):
+            self.bench("--view=post_detail", f"--compare={path}")
+
+    def test_caches_left_intact(self):
+        """Замер идёт на временных кешах и не очищает основные."""
+        cache.set("bench_views_test", 1)
+        self.bench("--view=index")
+        self.assertEqual(cache.get("bench_views_test"), 1)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.test.signals import template_rendered
+
+from posts.cards import CARD_TEMPLATE, render_cards
+from posts.models import Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.author = User.objects.create_user(
+            username="author", first_name="Имя", last_name="Фамилия"
+        )
+        self.group = Group.objects.create(title="Группа", slug="group")
+        for number in range(3):
+            Post.objects.create(
+                author=self.author, group=self.group, text=f"пост {number}"
+            )
+
+    def render(self, **kwargs):
+        """HTML карточек и число отрендеренных карточек."""
+        rendered = []
+
+        def collect(sender, template, **_):
+            if template.name == CARD_TEMPLATE:
+                rendered.append(template)
+
+        posts = Post.objects.select_related("author", "group")
+        template_rendered.connect(collect)
+        try:
+            html = render_cards(posts, **kwargs)
+        finally:
+            template_rendered.disconnect(collect)
+        return html, len(rendered)
+
+    def test_cached_cards_are_not_rendered(self):
+        """Повторная страница собирается из кеша одним get_many."""
+        _, first = self.render(show_group=True)
+        self.assertEqual(first, 3)
+        hot = mock.Mock(wraps=caches["hot"])
+        with mock.patch("posts.cards.caches", {"hot": hot}):
+            html, second = self.render(show_group=True)
+        self.assertEqual(second, 0)
+        self.assertEqual(hot.get_many.call_count, 1)
+        self.assertFalse(hot.set_many.called)
+        self.assertEqual(len(html), 3)
+
+    def test_changed_post_is_rendered_again(self):
+        """После правки поста перерисовывается только его карточка."""
+        self.render()
+        post = Post.objects.first()
+        post.text = "новый текст"
+        post.save()
+        html, rendered = self.render()
+        self.assertEqual(rendered, 1)
+        self.assertIn("новый текст", "".join(html))
+
+    def test_author_line_depends_on_page(self):
+        """Карточки профиля без строки автора кешируются отдельно."""
+        with_author, _ = self.render()
+        without_author, rendered = self.render(author=self.author)
+        self.assertEqual(rendered, 3)
+        self.assertIn("Фамилия", with_author[0])
+        self.assertNotIn("Фамилия", without_author[0])
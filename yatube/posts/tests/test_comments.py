@@ -0,0 +1,66 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.views import NUMBERS_OF_COMMENTS
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.post = Post.objects.create(author=cls.author, text="TEXT")
+
+    def setUp(self):
+        self.client = Client()
+
+    def comment(self, count):
+        start = Comment.objects.count()
+        for number in range(start, start + count):
+            Comment.objects.create(
+                post=self.post,
+                author=User.objects.create_user(username=f"reader{number}"),
+                text=f"comment {number}",
+            )
+
+    def detail_queries(self):
+        url = reverse("posts:post_detail", args=[self.post.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, len(queries)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_queries_do_not_grow_with_comments(self):
+        """Число запросов не зависит от числа комментариев и их авторов."""
+        self.comment(2)
+        self.detail_queries()  # создаёт счётчик комментариев
+        _, few = self.detail_queries()
+        self.comment(NUMBERS_OF_COMMENTS * 2)
+        response, many = self.detail_queries()
+        self.assertEqual(few, many)
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), NUMBERS_OF_COMMENTS)
+        self.assertContains(
+            response, f"Комментарии: {NUMBERS_OF_COMMENTS * 2 + 2}"
+        )
+
+    def test_load_more_fragment(self):
+        """Фрагмент отдаёт следующие комментарии по курсору."""
+        self.comment(NUMBERS_OF_COMMENTS + 3)
+        response, _ = self.detail_queries()
+        first = response.context["comments"]
+        self.assertTrue(first.has_next())
+        response = self.client.get(
+            reverse("posts:post_comments", args=[self.post.pk]),
+            {"after": first.paginator.next_cursor},
+        )
+        rest = response.context["comments"]
+        self.assertEqual(len(rest), 3)
+        self.assertFalse(rest.has_next())
+        self.assertNotContains(response, "<html")
+        self.assertNotContains(response, "Показать ещё")
+        seen = {comment.pk for comment in first} | {c.pk for c in rest}
+        self.assertEqual(len(seen), NUMBERS_OF_COMMENTS + 3)
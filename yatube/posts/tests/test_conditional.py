@@ -0,0 +1,96 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text="текст"
+        )
+        self.client = Client()
+        self.urls = [
+            reverse("posts:index"),
+            reverse("posts:group_list", args=[self.group.slug]),
+            reverse("posts:profile", args=[self.author.username]),
+            reverse("posts:post_detail", args=[self.post.pk]),
+        ]
+
+    def revalidate(self, url, response):
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        return again, [query["sql"] for query in queries]
+
+    def test_not_modified(self):
+        """Неизменившаяся страница отдаётся как 304 без выборки постов."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                again, queries = self.revalidate(url, response)
+                self.assertEqual(again.status_code, 304)
+                self.assertFalse(again.content)
+                # Страница поста читает одну строку поста для ETag.
+                self.assertLessEqual(len(queries), url == self.urls[-1])
+
+    def test_changes_invalidate_etag(self):
+        """Новый пост, новый и исправленный комментарий меняют ETag."""
+        responses = {url: self.client.get(url) for url in self.urls}
+        Post.objects.create(author=self.author, group=self.group, text="ещё")
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                again, _ = self.revalidate(url, response)
+                self.assertEqual(again.status_code, 200)
+        url = self.urls[-1]
+        response = self.client.get(url)
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text="к"
+        )
+        again, _ = self.revalidate(url, response)
+        self.assertEqual(again.status_code, 200)
+        comment.text = "исправленный"
+        comment.save()
+        again, _ = self.revalidate(url, again)
+        self.assertEqual(again.status_code, 200)
+        self.assertContains(again, "исправленный")
+
+    def test_author_and_group_changes_invalidate_etag(self):
+        """Новое имя автора или slug группы в карточках меняет ETag."""
+        renames = [
+            (self.author, "first_name", self.urls[:2]),
+            (self.group, "slug", self.urls[:1]),
+        ]
+        for obj, field, urls in renames:
+            responses = {url: self.client.get(url) for url in urls}
+            setattr(obj, field, "renamed")
+            obj.save()
+            for url, response in responses.items():
+                with self.subTest(url=url, field=field):
+                    again, _ = self.revalidate(url, response)
+                    self.assertEqual(again.status_code, 200)
+
+    def test_last_modified_only_for_anonymous(self):
+        """If-Modified-Since работает для гостей; ETag вошедшего
+        пользователя не подходит другому."""
+        url = self.urls[0]
+        response = self.client.get(url)
+        again = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(again.status_code, 304)
+        self.client.force_login(self.author)
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+        other = Client()
+        other.force_login(User.objects.create_user(username="other"))
+        again = other.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 200)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Counter, Follow, Group, Post, User
+
+TEXT = "TEXT_FOR_THE_TEST"
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="User")
+        cls.author = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Название", slug="slug", description="Описание"
+        )
+        cls.group2 = Group.objects.create(
+            title="Название_2", slug="slug_2", description="Описание_2"
+        )
+
+    def assertCounters(self, expected):
+        for (kind, object_id), value in expected.items():
+            with self.subTest(kind=kind, object_id=object_id):
+                self.assertEqual(counters.value(kind, object_id), value)
+                self.assertEqual(
+                    counters.source(kind, object_id).count(), value
+                )
+
+    def test_signals_keep_counters_in_sync(self):
+        """Счётчики обновляются при создании, правке и удалении."""
+        self.assertCounters({(Counter.AUTHOR_POSTS, self.author.pk): 0})
+        post = Post.objects.create(
+            author=self.author, text=TEXT, group=self.group
+        )
+        Post.objects.create(author=self.author, text=TEXT)
+        Comment.objects.create(author=self.user, post=post, text=TEXT)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        post.group = self.group2
+        post.save()
+        self.assertCounters(
+            {
+                (Counter.POSTS, 0): 2,
+                (Counter.AUTHOR_POSTS, self.author.pk): 2,
+                (Counter.GROUP_POSTS, self.group.pk): 0,
+                (Counter.GROUP_POSTS, self.group2.pk): 1,
+                (Counter.POST_COMMENTS, post.pk): 1,
+                (Counter.FOLLOWERS, self.author.pk): 1,
+                (Counter.FOLLOWING, self.user.pk): 1,
+            }
+        )
+        follow.delete()
+        post.delete()
+        self.assertCounters(
+            {
+                (Counter.POSTS, 0): 1,
+                (Counter.AUTHOR_POSTS, self.author.pk): 1,
+                (Counter.GROUP_POSTS, self.group2.pk): 0,
+                (Counter.FOLLOWERS, self.author.pk): 0,
+            }
+        )
+
+    def test_reconcile_counters_fixes_drift(self):
+        """Команда reconcile_counters исправляет разошедшиеся счётчики."""
+        Post.objects.create(author=self.author, text=TEXT, group=self.group)
+        counters.value(Counter.AUTHOR_POSTS, self.author.pk)
+        Counter.objects.update(value=42)
+        call_command("reconcile_counters", chunk_size=1, stdout=StringIO())
+        self.assertCounters(
+            {
+                (Counter.POSTS, 0): 1,
+                (Counter.AUTHOR_POSTS, self.author.pk): 1,
+                (Counter.GROUP_POSTS, self.group.pk): 1,
+            }
+        )
+
+    def test_profile_reads_count_from_counter(self):
+        """Профиль показывает число постов из счётчика."""
+        Post.objects.create(author=self.author, text=TEXT)
+        counters.value(Counter.AUTHOR_POSTS, self.author.pk)
+        Counter.objects.filter(
+            kind=Counter.AUTHOR_POSTS, object_id=self.author.pk
+        ).update(value=7)
+        response = Client().get(
+            reverse("posts:profile", args=(self.author.username,))
+        )
+        self.assertEqual(response.context["page_obj"].paginator.count, 7)
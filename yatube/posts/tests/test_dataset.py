@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import bulk, counters
+from posts.models import (
+    Comment,
+    Counter,
+    Follow,
+    Group,
+    Post,
+    TimelineEntry,
+    User,
+)
+from posts.search import search_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDatasetTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, prefix="gen", **options):
+        options = {
+            "users": 30,
+            "groups": 3,
+            "posts": 120,
+            "comments": 40,
+            "follows": 5,
+            "batch_size": 50,
+            **options,
+        }
+        call_command(
+            "generate_dataset", prefix=prefix, stdout=StringIO(), **options
+        )
+
+    def test_creates_consistent_dataset(self):
+        """Набор данных создан целиком, а производные данные -- счётчики,
+        ленты и поиск -- с ним согласованы."""
+        self.generate(images=2, image_share=0.5)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertTrue(Post.objects.exclude(image="").exists())
+        self.assertTrue(Follow.objects.exists())
+        for kind in (
+            Counter.AUTHOR_POSTS,
+            Counter.FOLLOWERS,
+            Counter.POST_COMMENTS,
+        ):
+            for counter in Counter.objects.filter(kind=kind):
+                self.assertEqual(
+                    counter.value,
+                    counters.source(kind, counter.object_id).count(),
+                )
+        self.assertEqual(
+            TimelineEntry.objects.count(),
+            Post.objects.filter(author__following__isnull=False).count(),
+        )
+        word = Post.objects.first().text.split()[0].rstrip(".").lower()
+        self.assertTrue(search_posts(word).exists())
+
+    def test_same_seed_same_data(self):
+        """С тем же --seed получается тот же набор данных."""
+        self.generate(prefix="first")
+        self.generate(prefix="second")
+        texts = Post.objects.order_by("pk").values_list("text", flat=True)
+        texts = list(texts)
+        self.assertEqual(texts[:120], texts[120:])
+
+    def test_existing_prefix_is_refused(self):
+        """Второй набор с тем же --prefix не создаётся."""
+        self.generate(posts=0, comments=0)
+        with self.assertRaises(CommandError):
+            self.generate(posts=0, comments=0)
+
+    def test_comments_only_on_dataset_posts(self):
+        """Комментарии достаются только постам набора, даже если кто-то
+        вставил свой пост между пачками."""
+        outsider = User.objects.create_user(username="Outsider")
+        create_posts = bulk.create_posts
+
+        def create_and_interfere(posts):
+            post_ids = create_posts(posts)
+            now = timezone.now()
+            Post.objects.create(
+                author=outsider, text="Чужой", pub_date=now, updated=now
+            )
+            return post_ids
+
+        with mock.patch.object(bulk, "create_posts", create_and_interfere):
+            self.generate(posts=20, comments=100, batch_size=10)
+        self.assertFalse(Comment.objects.filter(post__author=outsider))
+        self.assertEqual(Comment.objects.count(), 100)
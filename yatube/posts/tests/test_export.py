@@ -0,0 +1,96 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.staff = User.objects.create_user(username="Staff", is_staff=True)
+        cls.group = Group.objects.create(title="Кошки", slug="cats")
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f"Пост {number}"
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text="Привет"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self, *args):
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            pass
+        self.addCleanup(os.remove, file.name)
+        call_command(
+            "export_posts", f"--output={file.name}", *args, stderr=StringIO()
+        )
+        with open(file.name, "rb") as file:
+            return file.read()
+
+    def test_jsonl_in_chunks(self):
+        """Все посты по порядку id, сколько бы частей ни понадобилось."""
+        rows = [
+            json.loads(line)
+            for line in self.export("--chunk-size=2").decode().splitlines()
+        ]
+        self.assertEqual(
+            [row["id"] for row in rows], [post.pk for post in self.posts]
+        )
+        self.assertEqual(rows[0]["author"], "Author")
+        self.assertEqual(rows[0]["group"], "cats")
+        self.assertEqual(rows[0]["text"], "Пост 0")
+
+    def test_csv_gzip_and_since(self):
+        """Сжатый CSV; --since отбирает только изменённые позже строки."""
+        since = timezone.now()
+        Post.objects.filter(pk=self.posts[0].pk).update(
+            updated=since + timedelta(minutes=1)
+        )
+        data = gzip.decompress(
+            self.export("--format=csv", "--gzip", f"--since={since}")
+        )
+        rows = list(csv.DictReader(StringIO(data.decode())))
+        self.assertEqual([row["id"] for row in rows], [str(self.posts[0].pk)])
+
+    def test_comments_and_follows(self):
+        """Комментарии и подписки выгружаются с именами пользователей."""
+        comments = self.export("--dataset=comments").decode()
+        self.assertEqual(json.loads(comments)["post"], self.posts[0].pk)
+        follows = json.loads(self.export("--dataset=follows"))
+        self.assertEqual(
+            (follows["user"], follows["author"]), ("Reader", "Author")
+        )
+
+    def test_endpoint_is_staff_only_and_streams(self):
+        """Выгрузка по HTTP только для персонала и отдаётся потоком."""
+        url = reverse("posts:export", args=["posts"])
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(url, {"format": "csv", "gzip": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        data = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(data.decode().splitlines()), 6)
+        self.assertEqual(client.get(url, {"since": "вчера"}).status_code, 400)
+        self.assertEqual(
+            client.get(reverse("posts:export", args=["users"])).status_code,
+            404,
+        )
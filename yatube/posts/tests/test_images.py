@@ -0,0 +1,159 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(color=(200, 10, 10), size=(300, 200), fmt="PNG", **params):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="User")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        shutil.rmtree(default_storage.path("posts"), ignore_errors=True)
+
+    def upload(self, content, name="photo.png"):
+        self.response = self.client.post(
+            reverse("posts:post_create"),
+            {"text": "TEXT", "image": SimpleUploadedFile(name, content)},
+        )
+        return Post.objects.first()
+
+    def assertRejected(self, content, message):
+        self.assertIsNone(self.upload(content))
+        errors = self.response.context["form"].errors["image"]
+        self.assertIn(message, errors[0])
+
+    def test_upload_records_metadata_and_reuses_files(self):
+        """Сведения о картинке записаны, одинаковые файлы не дублируются."""
+        content = make_image()
+        post = self.upload(content)
+        self.assertEqual((post.image_width, post.image_height), (300, 200))
+        self.assertEqual(post.image_size, len(content))
+        self.assertEqual(len(post.image_hash), 64)
+        self.assertTrue(
+            post.image_placeholder.startswith("data:image/jpeg;base64,")
+        )
+        copy = self.upload(content, name="copy.png")
+        self.assertEqual(copy.image.name, post.image.name)
+        self.assertEqual(copy.image_hash, post.image_hash)
+        other = self.upload(make_image(color=(0, 0, 255)))
+        self.assertNotEqual(other.image.name, post.image.name)
+        self.assertEqual(len(default_storage.listdir("posts")[1]), 2)
+
+    def test_upload_is_decoded_once(self):
+        """Сведения о картинке берутся из проверки при загрузке, а не из
+        повторного декодирования файла."""
+        with mock.patch.object(Image, "open", wraps=Image.open) as opened:
+            post = self.upload(make_image(fmt="JPEG"), name="photo.jpg")
+        # Один раз файл открывает поле формы, второй -- prepare_upload.
+        self.assertEqual(opened.call_count, 2)
+        self.assertEqual((post.image_width, post.image_height), (300, 200))
+        self.assertTrue(post.image_placeholder)
+
+    def test_backfill_command(self):
+        """Команда заполняет сведения о картинках старых постов."""
+        name = default_storage.save("posts/old.png", ContentFile(make_image()))
+        post = Post.objects.create(author=self.user, text="TEXT", image=name)
+        missing = Post.objects.create(
+            author=self.user, text="TEXT", image="posts/missing.png"
+        )
+        self.assertIsNone(post.image_width)
+        broken_name = default_storage.save(
+            "posts/broken.png", ContentFile(b"not an image")
+        )
+        broken = Post.objects.create(
+            author=self.user, text="TEXT", image=broken_name
+        )
+        stderr = StringIO()
+        call_command(
+            "backfill_image_metadata",
+            "--chunk-size=1",
+            stdout=StringIO(),
+            stderr=stderr,
+        )
+        post.refresh_from_db()
+        missing.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (300, 200))
+        self.assertNotEqual(post.image_hash, "")
+        self.assertEqual(missing.image_hash, "")
+        self.assertEqual(broken.image_hash, "")
+        self.assertIn(broken_name, stderr.getvalue())
+
+    def test_backfill_skips_decompression_bombs(self):
+        """Картинка-бомба пропускается, остальные посты заполняются."""
+        names = [
+            default_storage.save(f"posts/{size}.png", ContentFile(content))
+            for size, content in (
+                ("huge", make_image(size=(300, 200))),
+                ("small", make_image(size=(10, 10))),
+            )
+        ]
+        posts = [
+            Post.objects.create(author=self.user, text="TEXT", image=name)
+            for name in names
+        ]
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            call_command(
+                "backfill_image_metadata", stdout=StringIO(), stderr=StringIO()
+            )
+        for post in posts:
+            post.refresh_from_db()
+        self.assertEqual(posts[0].image_hash, "")
+        self.assertEqual(posts[1].image_width, 10)
+
+    @override_settings(FILE_UPLOAD_MAX_BYTES=4000, IMAGE_MAX_PIXELS=10 ** 5)
+    def test_upload_limits(self):
+        """Слишком большие файлы и картинки отклоняются с понятной ошибкой."""
+        self.assertRejected(b"x" * 4001, "Файл больше")
+        self.assertRejected(make_image(size=(400, 300)), "мегапикселей")
+        self.assertRejected(
+            make_image(fmt="JPEG")[:1000], "Файл картинки повреждён"
+        )
+        self.assertIsNotNone(self.upload(make_image()))
+
+    @override_settings(IMAGE_MAX_SIDE=100, IMAGE_MAX_METADATA_BYTES=1024)
+    def test_upload_is_normalized(self):
+        """Большие картинки уменьшаются, а тяжёлые метаданные вырезаются."""
+        post = self.upload(make_image(size=(300, 150), fmt="JPEG"))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        self.assertTrue(post.image.name.endswith(".jpg"))
+        exif = Image.Exif()
+        exif[0x010E] = "x" * 4096
+        content = make_image(size=(80, 60), fmt="JPEG", exif=exif.tobytes())
+        post = self.upload(content, name="exif.jpg")
+        self.assertLess(post.image_size, len(content))
+        with post.image.open("rb") as file, Image.open(file) as image:
+            self.assertEqual(image.size, (80, 60))
+            self.assertNotIn("exif", image.info)
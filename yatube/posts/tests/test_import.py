@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import bulk, counters, search
+from posts.models import Counter, Follow, Group, Post, TimelineEntry, User
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.follower = User.objects.create_user(username="Follower")
+        cls.group = Group.objects.create(title="Кошки", slug="cats")
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def import_file(self, lines, suffix, *args):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        ) as file:
+            file.write("\n".join(lines))
+        self.addCleanup(os.remove, file.name)
+        stderr = StringIO()
+        call_command(
+            "import_posts", file.name, *args, stdout=StringIO(), stderr=stderr
+        )
+        return stderr.getvalue()
+
+    def test_jsonl_import_keeps_derived_data(self):
+        """Импорт сохраняет даты и обновляет счётчики, поиск и ленты."""
+        counters.value(Counter.AUTHOR_POSTS, self.author.pk)
+        counters.value(Counter.GROUP_POSTS, self.group.pk)
+        rows = [
+            {
+                "text": "Рыжий кот",
+                "author": "Author",
+                "group": "cats",
+                "pub_date": "2020-01-02T03:04:05+00:00",
+            },
+            {"text": "Серый кот", "author": "Author"},
+            {"text": "Без автора"},
+            {"text": "Чужой", "author": "Nobody"},
+        ]
+        errors = self.import_file(
+            [json.dumps(row) for row in rows] + ["{oops"],
+            ".jsonl",
+            "--batch-size=1",
+        )
+        self.assertEqual(errors.count("пропущена"), 3)
+        post = Post.objects.get(text="Рыжий кот")
+        self.assertEqual(
+            post.pub_date, datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        )
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            counters.value(Counter.AUTHOR_POSTS, self.author.pk), 2
+        )
+        self.assertEqual(counters.value(Counter.GROUP_POSTS, self.group.pk), 1)
+        self.assertEqual(
+            set(search.search_posts("кот").values_list("pk", flat=True)),
+            set(Post.objects.values_list("pk", flat=True)),
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 2
+        )
+
+    def test_csv_from_stdin_creates_missing(self):
+        """CSV из stdin; с --create-missing новые авторы и группы
+        создаются."""
+        stdin = StringIO("text,author,group\nПривет,Newbie,dogs\n")
+        with mock.patch("sys.stdin", stdin):
+            call_command(
+                "import_posts",
+                "-",
+                "--format=csv",
+                "--create-missing",
+                stdout=StringIO(),
+            )
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, "Newbie")
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.group.slug, "dogs")
+
+    def test_concurrent_insert_is_not_taken_for_imported(self):
+        """Пост, вставленный другим процессом во время импорта, не
+        считается импортированным: производные данные -- только у своих."""
+        reserve_ids = bulk.reserve_ids
+
+        def reserve_and_interfere(count):
+            ids = reserve_ids(count)
+            now = datetime.now(timezone.utc)
+            Post.objects.create(
+                author=self.follower,
+                text="Чужой кот",
+                pub_date=now,
+                updated=now,
+            )
+            return ids
+
+        with mock.patch.object(bulk, "reserve_ids", reserve_and_interfere):
+            self.import_file(
+                [json.dumps({"text": "Рыжий кот", "author": "Author"})],
+                ".jsonl",
+            )
+        self.assertEqual(
+            counters.value(Counter.AUTHOR_POSTS, self.follower.pk), 1
+        )
+        self.assertEqual(
+            sorted(search.search_posts("кот").values_list("text", flat=True)),
+            ["Рыжий кот", "Чужой кот"],
+        )
+        self.assertEqual(
+            list(
+                TimelineEntry.objects.values_list("post__text", flat=True)
+            ),
+            ["Рыжий кот"],
+        )
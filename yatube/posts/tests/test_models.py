@@ -1,6 +1,7 @@
-from django.test import TestCase
+from django.test import Client, TestCase
+from django.urls import reverse
 
-from posts.models import Group, Post, User, Comment
+from posts.models import EXCERPT_LENGTH, Group, Post, User, Comment
 
 
 CHARACTERS_TEXT = 15
@@ -86,3 +87,39 @@ class CommentModelTest(TestCase):
                 self.assertEqual(
                     task_comment._meta.get_field(value).verbose_name, expected
                 )
+
+
+class PostExcerptTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="User")
+
+    def test_excerpt_follows_text(self):
+        """Начало текста обновляется при save, update_fields и bulk_create"""
+        post = Post.objects.create(author=self.user, text="короткий текст")
+        self.assertEqual(post.excerpt, "короткий текст")
+        self.assertFalse(post.has_more)
+        post.text = "слово " * EXCERPT_LENGTH
+        post.save(update_fields=["text"])
+        post.refresh_from_db()
+        self.assertTrue(post.has_more)
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(post.text.startswith(post.excerpt))
+        Post.objects.bulk_create([Post(author=self.user, text="а" * 1000)])
+        bulk = Post.objects.get(text="а" * 1000)
+        self.assertEqual(bulk.excerpt, "а" * EXCERPT_LENGTH)
+        self.assertTrue(bulk.has_more)
+
+    def test_lists_show_excerpt_and_detail_full_text(self):
+        """Ленты выводят только начало текста, страница поста -- весь"""
+        text = "начало " * EXCERPT_LENGTH + "окончание"
+        post = Post.objects.create(author=self.user, text=text)
+        client = Client()
+        response = client.get(reverse("posts:index"))
+        self.assertNotContains(response, "окончание")
+        self.assertContains(response, "читать дальше")
+        listed = response.context["page_obj"][0]
+        self.assertIn("text", listed.get_deferred_fields())
+        response = client.get(reverse("posts:post_detail", args=[post.pk]))
+        self.assertContains(response, "окончание")
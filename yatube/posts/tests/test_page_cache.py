@@ -0,0 +1,124 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import pages
+from posts.models import Comment, Group, Post, User
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.other_group = Group.objects.create(title="Другая", slug="other")
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text="текст"
+        )
+        self.client = Client()
+        self.index = reverse("posts:index")
+        self.detail = reverse("posts:post_detail", args=[self.post.pk])
+        self.group_page = reverse("posts:group_list", args=["group"])
+        self.other_page = reverse("posts:group_list", args=["other"])
+
+    def cached(self, url):
+        """Отдалась ли страница из кеша (заодно прогревает его)."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response[pages.HEADER] == "HIT"
+
+    def warm(self, *urls):
+        for url in urls:
+            self.client.get(url)
+
+    def test_hit_skips_view(self):
+        """Повторная страница для гостя не обращается к базе."""
+        self.assertFalse(self.cached(self.index))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.index)
+        self.assertEqual(response[pages.HEADER], "HIT")
+        self.assertEqual(len(queries), 0)
+        self.assertIn("Surrogate-Key", self.client.get(self.detail))
+        again = self.client.get(
+            self.index, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_purge_only_affected_pages(self):
+        """Комментарий сбрасывает только страницу поста, новый пост --
+        ленты, где он появился, но не чужую группу."""
+        urls = (self.index, self.detail, self.group_page, self.other_page)
+        self.warm(*urls)
+        Comment.objects.create(post=self.post, author=self.author, text="к")
+        self.assertFalse(self.cached(self.detail))
+        self.assertTrue(self.cached(self.index))
+        Post.objects.create(author=self.author, group=self.group, text="ещё")
+        self.assertFalse(self.cached(self.index))
+        self.assertFalse(self.cached(self.group_page))
+        self.assertFalse(self.cached(self.detail))
+        self.assertTrue(self.cached(self.other_page))
+        self.other_group.title = "Новое название"
+        self.other_group.save()
+        self.assertFalse(self.cached(self.other_page))
+        self.assertTrue(self.cached(self.group_page))
+
+    def test_edited_post_is_purged(self):
+        """Правка поста сбрасывает ленту и страницу поста."""
+        self.warm(self.index, self.detail)
+        self.post.text = "исправленный текст"
+        self.post.save()
+        for url in (self.index, self.detail):
+            response = self.client.get(url)
+            self.assertEqual(response[pages.HEADER], "MISS")
+            self.assertContains(response, "исправленный текст")
+
+    def test_commenter_pages(self):
+        """Комментарий не сбрасывает профиль комментатора, а новое имя
+        комментатора сбрасывает страницу поста."""
+        commenter = User.objects.create_user(username="commenter")
+        profile = reverse("posts:profile", args=[commenter.username])
+        self.warm(profile)
+        Comment.objects.create(post=self.post, author=commenter, text="к")
+        self.assertTrue(self.cached(profile))
+        self.warm(self.detail)
+        commenter.username = "renamed"
+        commenter.save()
+        response = self.client.get(self.detail)
+        self.assertEqual(response[pages.HEADER], "MISS")
+        self.assertContains(response, "renamed")
+
+    def test_logged_in_gets_own_fragments(self):
+        """Оболочка страницы общая, а шапка, форма комментария и кнопка
+        подписки у каждого пользователя свои."""
+        reader = User.objects.create_user(username="reader")
+        self.client.force_login(reader)
+        self.assertFalse(self.cached(self.detail))
+        guest = self.client_class().get(self.detail)
+        self.assertEqual(guest[pages.HEADER], "HIT")
+        self.assertContains(guest, "Войти")
+        self.assertNotContains(guest, "Пользователь: reader")
+        self.assertNotContains(guest, "Добавить комментарий")
+        author = self.client_class()
+        author.force_login(self.author)
+        response = author.get(self.detail)
+        self.assertEqual(response[pages.HEADER], "HIT")
+        self.assertContains(response, "Пользователь: author")
+        self.assertContains(response, "редактировать запись")
+        self.assertContains(response, "Добавить комментарий")
+        self.assertNotEqual(response["ETag"], guest["ETag"])
+        profile = reverse("posts:profile", args=["author"])
+        self.warm(profile)
+        self.assertContains(self.client.get(profile), "Подписаться")
+        self.client.get(reverse("posts:profile_follow", args=["author"]))
+        response = self.client.get(profile)
+        self.assertEqual(response[pages.HEADER], "HIT")
+        self.assertContains(response, "Отписаться")
+
+    def test_stats(self):
+        """Попадания и промахи считаются только для кешируемых страниц."""
+        pages.reset_stats()
+        self.warm(self.index, self.index, self.index)
+        self.assertEqual(pages.stats(), {"hits": 2, "misses": 1})
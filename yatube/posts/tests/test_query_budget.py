@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+# Сколько запросов к базе может сделать страница с холодным кешем. Число
+# не должно зависеть ни от размера страницы, ни от объёма данных: если
+# тест упал после правки шаблона, скорее всего, вернулся N+1. Профиль и
+# страница поста тратят ещё по запросу на ETag.
+QUERY_BUDGETS = {
+    "index": 4,
+    "group_list": 5,
+    "profile": 8,
+    "follow_index": 5,
+    "post_detail": 7,
+    "post_comments": 2,
+    "search": 3,
+}
+
+# (размер страницы, число постов или комментариев)
+VOLUMES = ((3, 4), (10, 25))
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader")
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.author = User.objects.create_user(username="author")
+        self.post = Post.objects.create(author=self.author, text="слово")
+        self.created = 0
+
+    def populate(self, count):
+        """Посты разных авторов и групп, часть с картинками; читатель
+        подписан на всех авторов, к первому посту -- комментарии."""
+        for number in range(self.created, self.created + count):
+            author = User.objects.create_user(
+                username=f"author{number}", first_name=f"Имя{number}"
+            )
+            group = Group.objects.create(
+                title=f"Группа {number}", slug=f"group{number}"
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            image = f"posts/{number}.jpg" if number % 2 else ""
+            for post_author, post_group in (
+                (author, self.group),
+                (self.author, group),
+            ):
+                Post.objects.create(
+                    author=post_author,
+                    group=post_group,
+                    text=f"слово {number}",
+                    image=image,
+                )
+            Comment.objects.create(
+                post=self.post, author=author, text=f"комментарий {number}"
+            )
+        self.created += count
+
+    def queries(self, url, **params):
+        for cache in caches.all():
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertBudgets(self, views):
+        counts = {name: [] for name in views}
+        for page_size, volume in VOLUMES:
+            self.populate(volume - self.created)
+            with mock.patch(
+                "posts.views.NUMBERS_OF_POSTS", page_size
+            ), mock.patch("posts.views.NUMBERS_OF_COMMENTS", page_size):
+                for name, (url, params) in views.items():
+                    # Первый запрос создаёт недостающие счётчики.
+                    self.queries(url, **params)
+                    counts[name].append(self.queries(url, **params))
+        for name, measured in counts.items():
+            with self.subTest(name, counts=measured):
+                self.assertEqual(len(set(measured)), 1)
+                self.assertLessEqual(measured[0], QUERY_BUDGETS[name])
+
+    def test_list_views(self):
+        """Ленты укладываются в бюджет запросов при любом объёме данных."""
+        self.assertBudgets(
+            {
+                "index": (reverse("posts:index"), {}),
+                "group_list": (
+                    reverse("posts:group_list", args=["group"]),
+                    {},
+                ),
+                "profile": (reverse("posts:profile", args=["author"]), {}),
+                "follow_index": (reverse("posts:follow_index"), {}),
+                "search": (reverse("posts:search"), {"q": "слово"}),
+            }
+        )
+
+    def test_post_views(self):
+        """Страница поста и подгрузка комментариев тоже без N+1."""
+        self.assertBudgets(
+            {
+                "post_detail": (
+                    reverse("posts:post_detail", args=[self.post.pk]),
+                    {},
+                ),
+                "post_comments": (
+                    reverse("posts:post_comments", args=[self.post.pk]),
+                    {},
+                ),
+            }
+        )
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+URL = reverse("posts:search")
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query, **params):
+        return self.client.get(URL, {"q": query, **params})
+
+    def found(self, response):
+        return [post.pk for post in response.context["page_obj"]]
+
+    def test_signals_keep_index_in_sync(self):
+        """Новые, изменённые и удалённые посты сразу видны в поиске."""
+        post = Post.objects.create(author=self.author, text="Рыжий кот")
+        self.assertEqual(self.found(self.search("кот")), [post.pk])
+        post.text = "Рыжая собака"
+        post.save()
+        self.assertEqual(self.found(self.search("кот")), [])
+        self.assertEqual(self.found(self.search("собака")), [post.pk])
+        post.delete()
+        self.assertEqual(self.found(self.search("собака")), [])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        """Совпадения выделены, а разметка из текста поста экранирована."""
+        Post.objects.create(
+            author=self.author, text="<script>кот</script> спит"
+        )
+        response = self.search("кот")
+        self.assertContains(response, "&lt;script&gt;<mark>кот</mark>")
+        self.assertNotContains(response, "<script>кот")
+
+    def test_results_ranked_and_paged_by_cursor(self):
+        """Релевантные посты идут первыми, курсор обходит все без повторов."""
+        best = Post.objects.create(author=self.author, text="кот кот кот")
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f"кот и собака {number}")
+            for number in range(14)
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+        first = self.search("кот").context["page_obj"]
+        self.assertEqual(first[0], best)
+        second = self.search(
+            "кот", after=first.paginator.next_cursor
+        ).context["page_obj"]
+        found = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(len(found), 15)
+        self.assertEqual(len(set(found)), 15)
+        self.assertFalse(second.has_next())
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Операторы FTS5 в строке поиска не ломают запрос."""
+        Post.objects.create(author=self.author, text="кот OR собака")
+        for query in ('кот"', "NOT кот", "кот*", "(", "кот AND"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+        self.assertIsNone(self.search("!!!").context["page_obj"])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по словам, а не по подстроке."""
+        admin = User.objects.create_superuser("admin", "a@a.ru", "password")
+        post = Post.objects.create(author=self.author, text="Рыжий кот")
+        Post.objects.create(author=self.author, text="Котлета")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "кот"}
+        )
+        self.assertEqual(list(response.context["cl"].result_list), [post])
@@ -0,0 +1,146 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.timeline import pulled_author_ids
+
+TEXT = "TEXT_FOR_THE_TEST"
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.other = User.objects.create_user(username="Other")
+        cls.old_post = Post.objects.create(author=cls.author, text=TEXT)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow_page(self):
+        response = self.client.get(reverse("posts:follow_index"))
+        return list(response.context["page_obj"])
+
+    def test_follow_backfills_timeline(self):
+        """Подписка дописывает в ленту старые посты автора."""
+        self.client.get(
+            reverse("posts:profile_follow", args=(self.author.username,))
+        )
+        self.assertEqual(self.follow_page(), [self.old_post])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text=TEXT)
+        Post.objects.create(author=self.other, text=TEXT)
+        self.assertEqual(self.follow_page(), [post, self.old_post])
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.get(
+            reverse("posts:profile_unfollow", args=(self.author.username,))
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page(), [])
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленты по подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertEqual(self.follow_page(), [self.old_post])
+
+
+@override_settings(FEED_PULL_THRESHOLD=1)
+class HybridFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.fan = User.objects.create_user(username="Fan")
+        cls.star = User.objects.create_user(username="Star")
+        cls.author = User.objects.create_user(username="Author")
+
+    def setUp(self):
+        cache.clear()
+        Follow.objects.create(user=self.fan, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_popular_author_is_pulled(self):
+        """Посты автора выше порога не раскладываются, но видны в ленте."""
+        posts = [
+            Post.objects.create(author=author, text=TEXT)
+            for author in (self.star, self.author, self.star)
+        ]
+        self.assertFalse(TimelineEntry.objects.filter(author=self.star))
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(
+            list(response.context["page_obj"]), list(reversed(posts))
+        )
+        self.assertIn("feed-merge;dur=", response["Server-Timing"])
+
+    def test_merged_feed_pages_by_cursor(self):
+        """Слитая лента листается курсором без пропусков и повторов."""
+        posts = [
+            Post.objects.create(author=author, text=TEXT)
+            for author in (self.star, self.author) * 8
+        ]
+        url = reverse("posts:follow_index")
+        first = self.client.get(url).context["page_obj"]
+        second = self.client.get(
+            url, {"after": first.paginator.next_cursor}
+        ).context["page_obj"]
+        self.assertEqual(list(first) + list(second), list(reversed(posts)))
+
+    def test_author_back_below_threshold_is_pushed_again(self):
+        """Посты, написанные, пока автор был выше порога, попадают в
+        ленты подписчиков, когда он опускается до порога."""
+        post = Post.objects.create(author=self.star, text=TEXT)
+        Follow.objects.filter(user=self.fan, author=self.star).delete()
+        feed = self.client.get(reverse("posts:follow_index")).context
+        self.assertEqual(list(feed["page_obj"]), [post])
+        Follow.objects.create(user=self.fan, author=self.star)
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.fan, post=post)
+        )
+        newer = Post.objects.create(author=self.star, text=TEXT)
+        Follow.objects.filter(user=self.reader, author=self.star).delete()
+        self.assertEqual(
+            set(
+                TimelineEntry.objects.filter(user=self.fan).values_list(
+                    "post_id", flat=True
+                )
+            ),
+            {post.pk, newer.pk},
+        )
+
+    def test_threshold_change_is_reconciled(self):
+        """После смены порога режим авторов сходится со счётчиками:
+        при следующей подписке или при пересборке лент."""
+        post = Post.objects.create(author=self.star, text=TEXT)
+        self.assertIn(self.star.pk, pulled_author_ids())
+        with override_settings(FEED_PULL_THRESHOLD=10):
+            Follow.objects.create(user=self.author, author=self.star)
+            self.assertNotIn(self.star.pk, pulled_author_ids())
+            self.assertTrue(
+                TimelineEntry.objects.filter(user=self.fan, post=post)
+            )
+        with override_settings(FEED_PULL_THRESHOLD=0):
+            call_command("rebuild_timelines", stdout=StringIO())
+            self.assertEqual(
+                pulled_author_ids(), {self.star.pk, self.author.pk}
+            )
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertEqual(pulled_author_ids(), {self.star.pk})
+        self.assertFalse(TimelineEntry.objects.filter(author=self.star))
@@ -8,6 +8,7 @@ from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
+from core.paginator import pack_cursor
 from posts.models import Group, Post, User, Follow, Comment
 from posts.forms import CommentForm
 
@@ -34,6 +35,8 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        # Страницы из кеша отдаются без контекста и шаблонов.
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.author)
@@ -170,17 +173,48 @@ class PostPagesTests(TestCase):
         self.assertNotEqual(group2, self.group)
 
     def test_check_cache(self):
-        """Проверка кеша."""
+        """Проверка кеша: страница сбрасывается при изменении постов."""
+        cache.clear()
         response = self.guest_client.get(reverse("posts:index"))
         cache_data = response.content
-        Post.objects.get(id=1).delete()
+        Post.objects.filter(pk=self.post.pk).update(text="UPDATED_TEXT")
         response2 = self.guest_client.get(reverse("posts:index"))
         cache_data2 = response2.content
         self.assertEqual(cache_data, cache_data2)
-        cache.clear()
+        Post.objects.get(pk=self.post.pk).delete()
         response3 = self.guest_client.get(reverse("posts:index"))
         cache_data3 = response3.content
         self.assertNotEqual(cache_data, cache_data3)
+        self.assertNotContains(response3, "UPDATED_TEXT")
+
+    def test_cache_follows_author_and_group_changes(self):
+        """Новое имя автора и slug группы сразу видны в списках."""
+        urls = [
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+        ]
+        for url in urls:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.post.author_id)
+        author.first_name = "RENAMED_AUTHOR"
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = "renamed-slug"
+        group.save()
+        urls[1] = reverse("posts:group_list", kwargs={"slug": "renamed-slug"})
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, "RENAMED_AUTHOR")
+        response = self.guest_client.get(urls[0])
+        self.assertContains(response, "renamed-slug")
+
+    def test_cache_keeps_user_parts_out(self):
+        """Закешированная для гостя страница не прячет меню от автора."""
+        cache.clear()
+        self.guest_client.get(reverse("posts:index"))
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, reverse("posts:follow_index"))
 
 
 class FollowTests(TestCase):
@@ -274,6 +308,8 @@ class PostImageTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        # Страницы из кеша отдаются без контекста и шаблонов.
+        cache.clear()
         self.guest_client = Client()
         self.client = Client()
         self.client.force_login(self.user)
@@ -330,6 +366,8 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(cls.posts)
 
     def setUp(self):
+        # Страницы из кеша отдаются без контекста и шаблонов.
+        cache.clear()
         self.authorized_author = Client()
         self.authorized_author.force_login(self.user)
 
@@ -340,14 +378,64 @@ class PaginatorViewsTest(TestCase):
             ("posts:group_list", (self.group.slug,)),
             ("posts:profile", (self.user.username,)),
         )
-        pages_units = (
-            ("?page=1", COUNT_POST_PAGE_1),
-            ("?page=2", COUNT_POST_PAGE_2),
-        )
         for address, args in pagin_urls:
-            for page, count_posts in pages_units:
-                with self.subTest(page=page):
-                    response = self.authorized_author.get(
-                        reverse(address, args=args) + page
-                    )
-            self.assertEqual(len(response.context["page_obj"]), count_posts)
+            with self.subTest(address=address):
+                url = reverse(address, args=args)
+                page_obj = self.authorized_author.get(url).context["page_obj"]
+                self.assertEqual(len(page_obj), COUNT_POST_PAGE_1)
+                response = self.authorized_author.get(
+                    url, {"after": page_obj.paginator.next_cursor}
+                )
+                self.assertEqual(
+                    len(response.context["page_obj"]), COUNT_POST_PAGE_2
+                )
+
+    def test_cursor_pages_walk_back_and_forth(self):
+        """Курсоры ведут вперёд и назад без пропусков и повторов."""
+        url = reverse("posts:index")
+        first = self.authorized_author.get(url).context["page_obj"]
+        second = self.authorized_author.get(
+            url, {"after": first.paginator.next_cursor}
+        ).context["page_obj"]
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        expected = Post.objects.order_by("-pub_date", "-id").values_list(
+            "pk", flat=True
+        )
+        self.assertEqual(
+            [post.pk for post in first] + [post.pk for post in second],
+            list(expected),
+        )
+        back = self.authorized_author.get(
+            url, {"before": second.paginator.previous_cursor}
+        ).context["page_obj"]
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_cached_pages_vary_on_cursor(self):
+        """Кеш хранит каждую страницу отдельно."""
+        cache.clear()
+        url = reverse("posts:index")
+        first = self.authorized_author.get(url)
+        second = self.authorized_author.get(
+            url, {"after": first.context["page_obj"].paginator.next_cursor}
+        )
+        self.assertNotEqual(first.content, second.content)
+        self.assertContains(second, "TEXT", count=COUNT_POST_PAGE_2)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Повреждённый курсор отдаёт первую страницу."""
+        huge_id = pack_cursor("2020-01-01T00:00:00+00:00", 10 ** 30)
+        for cursor in ("not-a-cursor", huge_id):
+            with self.subTest(cursor=cursor):
+                response = self.authorized_author.get(
+                    reverse("posts:index"), {"after": cursor}
+                )
+                page_obj = response.context["page_obj"]
+                self.assertEqual(len(page_obj), COUNT_POST_PAGE_1)
+                self.assertFalse(page_obj.has_previous())
+        response = self.authorized_author.get(
+            reverse("posts:search"),
+            {"q": TEXT, "after": pack_cursor(1.0, 10 ** 30)},
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,258 @@
+import heapq
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from core.cache.stampede import get_or_compute
+from core.paginator import CursorPaginator, encode_cursor
+from . import counters
+from .models import Counter, Follow, Post, PulledAuthor, TimelineEntry
+
+BACKFILL_BATCH_SIZE = 1000
+PULLED_AUTHORS_CACHE_KEY = "feed:pulled_authors"
+PULLED_AUTHORS_TIMEOUT = 60
+
+
+def pulled_author_ids():
+    """Авторы в режиме pull (PulledAuthor).
+
+    Их посты не раскладываются по лентам, а читаются при открытии ленты.
+    """
+    return get_or_compute(
+        PULLED_AUTHORS_CACHE_KEY,
+        lambda: set(
+            PulledAuthor.objects.values_list("author_id", flat=True)
+        ),
+        PULLED_AUTHORS_TIMEOUT,
+    )
+
+
+def _switch_modes(popular, pulled):
+    """Переводит в pull авторов из popular, которых нет в pulled, и в
+    push -- авторов из pulled, которых нет в popular. Пока автор был в
+    режиме pull, его посты не раскладывались по лентам, поэтому при
+    переходе в push он дописывается в ленты всех своих подписчиков.
+    Возвращает число авторов, сменивших режим."""
+    pushed = pulled - popular
+    added = popular - pulled
+    if not pushed and not added:
+        return 0
+    PulledAuthor.objects.filter(author_id__in=pushed).delete()
+    PulledAuthor.objects.bulk_create(
+        (PulledAuthor(author_id=pk) for pk in added), ignore_conflicts=True
+    )
+    cache.delete(PULLED_AUTHORS_CACHE_KEY)
+    for author_id in pushed:
+        backfill_followers(author_id)
+    return len(pushed) + len(added)
+
+
+def refresh_pulled_authors(author_id):
+    """Режим автора после подписки или отписки: pull, если подписчиков
+    больше FEED_PULL_THRESHOLD, иначе push.
+
+    Число подписчиков сравнивается с сохранённым режимом, а не ловится
+    момент перехода через порог, поэтому автор не застревает в чужом
+    режиме после смены порога.
+    """
+    followers = counters.value(Counter.FOLLOWERS, author_id)
+    popular = set()
+    if followers > settings.FEED_PULL_THRESHOLD:
+        popular.add(author_id)
+    pulled = set(
+        PulledAuthor.objects.filter(author_id=author_id).values_list(
+            "author_id", flat=True
+        )
+    )
+    _switch_modes(popular, pulled)
+
+
+def reconcile_pulled_authors():
+    """Режим всех авторов по подпискам в базе -- после смены порога
+    FEED_PULL_THRESHOLD или импорта подписок мимо сигналов. Возвращает
+    число авторов, сменивших режим."""
+    popular = set(
+        Follow.objects.values("author_id")
+        .annotate(followers=Count("pk"))
+        .filter(followers__gt=settings.FEED_PULL_THRESHOLD)
+        .values_list("author_id", flat=True)
+    )
+    pulled = set(PulledAuthor.objects.values_list("author_id", flat=True))
+    return _switch_modes(popular, pulled)
+
+
+def bulk_insert(entries):
+    """Вставляет записи ленты пачками, не держа их все в памяти."""
+    entries = iter(entries)
+    created = 0
+    while True:
+        batch = list(islice(entries, BACKFILL_BATCH_SIZE))
+        if not batch:
+            return created
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+
+
+def _entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        pub_date=post.pub_date,
+    )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id in pulled_author_ids():
+        return
+    follower_ids = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    bulk_insert(_entry(user_id, post) for user_id in follower_ids.iterator())
+
+
+def fan_out_posts(posts):
+    """Раскладывает по лентам подписчиков посты, вставленные мимо
+    сигналов (bulk_create), одним INSERT ... SELECT: строки ленты не
+    проходят через Python. Посты должны быть новыми -- их записей в
+    лентах ещё нет."""
+    rows = (
+        posts.filter(author__following__isnull=False)
+        .exclude(author_id__in=pulled_author_ids())
+        # Строки одного подписчика рядом: индексы ленты обновляются
+        # по соседним страницам, а не вразброс.
+        .order_by("author__following__user_id")
+        .values_list(
+            "author__following__user_id", "pk", "author_id", "pub_date"
+        )
+    )
+    sql, params = rows.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {TimelineEntry._meta.db_table} "
+            f"(user_id, post_id, author_id, pub_date) {sql}",
+            params,
+        )
+        return cursor.rowcount
+
+
+def backfill(user_id, author_id):
+    """Дописывает в ленту подписчика все посты автора."""
+    if author_id in pulled_author_ids():
+        return
+    posts = Post.objects.filter(author_id=author_id).only(
+        "pk", "author_id", "pub_date"
+    )
+    bulk_insert(_entry(user_id, post) for post in posts.iterator())
+
+
+def backfill_followers(author_id):
+    """Дописывает все посты автора в ленты всех его подписчиков."""
+    rows = (
+        Post.objects.filter(author_id=author_id)
+        .filter(author__following__isnull=False)
+        .order_by("author__following__user_id")
+        .values_list(
+            "author__following__user_id", "pk", "author_id", "pub_date"
+        )
+    )
+    return bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id, post_id, author_id, pub_date in rows.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def timeline_for(user):
+    return (
+        TimelineEntry.objects.filter(user=user)
+        .select_related("post__author", "post__group")
+        .defer("post__text")
+    )
+
+
+def pulled_for(user):
+    """Посты популярных авторов из подписок: по запросу на автора."""
+    author_ids = Follow.objects.filter(
+        user=user, author_id__in=pulled_author_ids()
+    ).values_list("author_id", flat=True)
+    return [
+        Post.objects.filter(author_id=pk)
+        .select_related("author", "group")
+        .defer("text")
+        for pk in author_ids
+    ]
+
+
+def _post_key(post):
+    return post.pub_date, post.pk
+
+
+class FeedPaginator(CursorPaginator):
+    """Курсорная пагинация гибридной ленты подписок.
+
+    Записи материализованной ленты (push) и посты популярных авторов,
+    читаемые напрямую (pull), сливаются k-путевым слиянием по
+    (pub_date, id). Время каждого этапа сохраняется в timings.
+    """
+
+    key_field = "post_id"
+
+    def __init__(self, object_list, per_page, pulled=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.pulled = [
+            posts.order_by(f"-{self.date_field}", "-id") for posts in pulled
+        ]
+        self.timings = {}
+
+    def _fetch(self, position, forward):
+        started = time.perf_counter()
+        streams = [[entry.post for entry in super()._fetch(position, forward)]]
+        pushed = time.perf_counter()
+        for posts in self.pulled:
+            if position is not None:
+                posts = self._after(posts, position, forward, key_field="id")
+            if not forward:
+                posts = posts.reverse()
+            streams.append(list(posts[: self.per_page + 1]))
+        pulled = time.perf_counter()
+        rows = []
+        seen = set()
+        for post in heapq.merge(*streams, key=_post_key, reverse=forward):
+            if post.pk in seen:
+                continue
+            seen.add(post.pk)
+            rows.append(post)
+            if len(rows) > self.per_page:
+                break
+        merged = time.perf_counter()
+        self.timings = {
+            "feed-push": (pushed - started) * 1000,
+            "feed-pull": (pulled - pushed) * 1000,
+            "feed-merge": (merged - pulled) * 1000,
+        }
+        return rows
+
+    def _cursor(self, post):
+        return encode_cursor(post.pub_date, post.pk)
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing с временем этапов ленты."""
+        return ", ".join(
+            f"{name};dur={duration:.2f}"
+            for name, duration in self.timings.items()
+        )
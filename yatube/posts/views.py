@@ -1,62 +1,163 @@
+from functools import partial
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import condition
 
+from core.cache import pages
+from core.paginator import CursorPaginator
+from . import caching, conditional, counters, export
+from .caching import get_author, get_group
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .models import Comment, Counter, Post, Follow
+from .search import SearchPaginator, search_posts, to_match
+from .timeline import FeedPaginator, pulled_for, timeline_for
 
 NUMBERS_OF_POSTS = 10
+NUMBERS_OF_COMMENTS = 20
 
 
-def get_page_content(post_list, page_number):
-    paginator = Paginator(post_list, NUMBERS_OF_POSTS)
-    return paginator.get_page(page_number)
+def get_page_content(
+    post_list, request, paginator_class=CursorPaginator, **kwargs
+):
+    paginator = paginator_class(post_list, NUMBERS_OF_POSTS, **kwargs)
+    return paginator.get_cursor_page(
+        after=request.GET.get("after"), before=request.GET.get("before")
+    )
 
 
+@condition(
+    etag_func=conditional.index_etag,
+    last_modified_func=conditional.posts_last_modified,
+)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = get_page_content(post_list, request.GET.get("page"))
-    return render(request, "posts/index.html", context={"page_obj": page_obj})
+    post_list = Post.objects.select_related("author", "group").defer("text")
+    page_obj = get_page_content(
+        post_list, request, count=partial(counters.value, Counter.POSTS)
+    )
+    pages.tag(
+        request, caching.POSTS_PAGES, partial(caching.page_keys, page_obj)
+    )
+    return render(
+        request,
+        "posts/index.html",
+        context={"page_obj": page_obj},
+    )
 
 
+@condition(
+    etag_func=conditional.group_etag,
+    last_modified_func=conditional.posts_last_modified,
+)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page_content(posts, request.GET.get("page"))
+    group = get_group(slug)
+    posts = group.posts.select_related("author").defer("text")
+    page_obj = get_page_content(
+        posts,
+        request,
+        count=partial(counters.value, Counter.GROUP_POSTS, group.pk),
+    )
+    pages.tag(
+        request,
+        caching.GROUP_PAGES.format(pk=group.pk),
+        caching.GROUP_POSTS_PAGES.format(pk=group.pk),
+        partial(caching.page_keys, page_obj),
+    )
     return render(
         request,
         "posts/group_list.html",
-        context={"group": group, "page_obj": page_obj},
+        context={
+            "group": group,
+            "page_obj": page_obj,
+        },
     )
 
 
+@condition(
+    etag_func=conditional.profile_etag,
+    last_modified_func=conditional.posts_last_modified,
+)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=user).exists()
+    user = get_author(username)
+    posts = user.posts.select_related("group").defer("text")
+    page_obj = get_page_content(
+        posts,
+        request,
+        count=partial(counters.value, Counter.AUTHOR_POSTS, user.pk),
+    )
+    pages.tag(
+        request,
+        caching.AUTHOR_PAGES.format(pk=user.pk),
+        caching.AUTHOR_POSTS_PAGES.format(pk=user.pk),
+        partial(caching.page_keys, page_obj),
     )
-    page_obj = get_page_content(posts, request.GET.get("page"))
     return render(
         request,
         "posts/profile.html",
         context={
             "author": user,
             "page_obj": page_obj,
-            "following": following,
         },
     )
 
 
+def get_comments_page(post_id, after=None):
+    """Страница комментариев поста вместе с авторами; общее число
+    комментариев берётся из счётчика, а не COUNT(*)."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related("author"),
+        NUMBERS_OF_COMMENTS,
+        count=lambda: counters.value(Counter.POST_COMMENTS, post_id),
+    )
+    return paginator.get_cursor_page(after=after)
+
+
+@condition(etag_func=conditional.post_detail_etag)
 def post_detail(request, post_id):
     form = CommentForm()
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related("author", "group"), pk=post_id
+    )
+    comments = get_comments_page(
+        post.pk, after=request.GET.get("comments_after")
+    )
+    pages.tag(
+        request,
+        caching.POST_PAGES.format(pk=post.pk),
+        caching.COMMENTS_PAGES.format(pk=post.pk),
+        post.group_id and caching.GROUP_PAGES.format(pk=post.group_id),
+        caching.AUTHOR_PAGES.format(pk=post.author_id),
+        caching.AUTHOR_POSTS_PAGES.format(pk=post.author_id),
+        # Под комментариями выводятся имена их авторов.
+        *(
+            caching.AUTHOR_PAGES.format(pk=comment.author_id)
+            for comment in comments
+        ),
+    )
     return render(
         request,
         "posts/post_detail.html",
-        context={"post": post, "form": form, "comments": comments},
+        context={
+            "post": post,
+            "form": form,
+            "comments": comments,
+            "author_posts_count": counters.value(
+                Counter.AUTHOR_POSTS, post.author_id
+            ),
+        },
+    )
+
+
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для «Показать ещё»."""
+    post = get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    comments = get_comments_page(post.pk, after=request.GET.get("after"))
+    return render(
+        request,
+        "includes/comment_list.html",
+        context={"post": post, "comments": comments},
     )
 
 
@@ -107,14 +208,38 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_page_content(posts, request.GET.get("page"))
-    return render(request, "posts/follow.html", context={"page_obj": page_obj})
+    page_obj = get_page_content(
+        timeline_for(request.user),
+        request,
+        paginator_class=FeedPaginator,
+        pulled=pulled_for(request.user),
+    )
+    response = render(
+        request, "posts/follow.html", context={"page_obj": page_obj}
+    )
+    response["Server-Timing"] = page_obj.paginator.server_timing()
+    return response
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    page_obj = None
+    if to_match(query) is not None:
+        page_obj = get_page_content(
+            search_posts(query),
+            request,
+            paginator_class=SearchPaginator,
+        )
+    return render(
+        request,
+        "posts/search.html",
+        context={"query": query, "page_obj": page_obj},
+    )
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("posts:follow_index")
@@ -122,6 +247,32 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("posts:follow_index")
+
+
+@staff_member_required
+def export_data(request, dataset):
+    """Выгрузка набора данных, которая отдаётся по мере выборки из базы."""
+    if dataset not in export.DATASETS:
+        raise Http404
+    format = request.GET.get("format", "jsonl")
+    if format not in export.FORMATS:
+        return HttpResponseBadRequest(f"Неизвестный формат: {format}")
+    since = request.GET.get("since")
+    if since:
+        try:
+            since = export.parse_since(since)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+    compress = bool(request.GET.get("gzip"))
+    response = StreamingHttpResponse(
+        export.encode(export.lines(dataset, format, since or None), compress),
+        content_type=(
+            "application/gzip" if compress else export.CONTENT_TYPES[format]
+        ),
+    )
+    filename = f"{dataset}.{format}" + (".gz" if compress else "")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
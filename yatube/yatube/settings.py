@@ -35,6 +35,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.cache.pages.PageCacheMiddleware",
 ]
 
 ROOT_URLCONF = "yatube.urls"
@@ -109,5 +110,59 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 CACHES = {
-    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    "default": {
+        "BACKEND": "core.cache.sqlite.SQLiteCache",
+        "LOCATION": os.environ.get(
+            "YATUBE_CACHE_LOCATION", os.path.join(BASE_DIR, "cache.sqlite3")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+    "hot": {
+        "BACKEND": "core.cache.tiered.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {"MAX_ENTRIES": 1000, "L1_TIMEOUT": 5},
+    },
+}
+
+# Тесты очищают кеш: manage.py test, как и pytest через conftest.py,
+# переносит файлы кешей SQLite во временный каталог.
+TEST_RUNNER = "core.runner.TemporaryCacheRunner"
+
+FEED_PULL_THRESHOLD = 10000
+
+PAGE_CACHE_ALIAS = "default"
+
+# Кеш страниц для анонимных посетителей; 0 отключает его.
+PAGE_CACHE_TIMEOUT = 600
+
+# Миниатюры, которые создаются заранее при загрузке картинки.
+THUMBNAIL_PRESETS = {
+    "post_card": ("960x339", {"crop": "center", "upscale": True}),
 }
+
+THUMBNAIL_WORKERS = 2
+
+# Варианты картинок постов для srcset: ширины в пикселях и, если задано,
+# пропорции кадрирования. Каждая ширина сохраняется во всех форматах
+# IMAGE_VARIANT_FORMATS, которые умеет кодировать Pillow.
+IMAGE_VARIANTS = {
+    "post_card": {"widths": (320, 480, 640, 960), "crop": (960, 339)},
+    "post_detail": {"widths": (480, 800, 1200, 1600, 2048)},
+}
+
+IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
+
+# Загрузки пишутся во временный файл с подсчётом SHA-256 и не держатся
+# в памяти целиком; всё, что больше FILE_UPLOAD_MAX_BYTES, отклоняется.
+FILE_UPLOAD_HANDLERS = ["core.uploads.HashingUploadHandler"]
+
+FILE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+
+# Картинки больше IMAGE_MAX_PIXELS не декодируются вовсе; стороны больше
+# IMAGE_MAX_SIDE уменьшаются при загрузке, вместе с этим вырезаются
+# метаданные (EXIF, ICC и т. п.) объёмом больше IMAGE_MAX_METADATA_BYTES.
+IMAGE_MAX_PIXELS = 40_000_000
+
+IMAGE_MAX_SIDE = 4096
+
+IMAGE_MAX_METADATA_BYTES = 16 * 1024